@@ -0,0 +1,82 @@
+"""
+Auto-reply prompt size and latency vs conversation length (user-022), against
+the stub LLM. For each length the conversation is played turn by turn, as the
+WebSocket loop does, then one auto_reply call is measured with the full
+transcript (the old get_messages_by_autoKey path) and with build_auto_history
+(recent window plus rolling summary). Summary calls made while playing the
+conversation are counted separately.
+
+    python benchmarks/auto_history_prompt_size.py --lengths 10 50 200 1000 --delay 0.05 [--fake-redis]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+import common
+import stub_llm
+
+
+async def _measure(history_text: str) -> tuple[int, float]:
+    from services import translation_service
+    start = time.perf_counter()
+    await translation_service.auto_reply_async(["Works as a travel agent"], history_text)
+    return stub_llm.stats["prompt_tokens"][-1], time.perf_counter() - start
+
+
+async def _conversation(length: int) -> tuple[tuple[int, float], tuple[int, float], int]:
+    from services import chat_history, redis_service
+    session_id, auto_key = f"bench-history-{length}", "bench"
+    summary_calls = 0
+    try:
+        for turn in range(length):
+            role = "guest" if turn % 2 == 0 else "host"
+            await redis_service.save_message_async(
+                session_id, role, f"{role} turn {turn}: could we book the 7pm table for four people?",
+                f"{role} turno {turn}: podemos reservar la mesa de las 7pm para cuatro personas?", True, auto_key,
+            )
+            if role == "guest":
+                before = stub_llm.stats["requests"]
+                await chat_history.build_auto_history(session_id, auto_key)
+                summary_calls += stub_llm.stats["requests"] - before
+
+        messages = await redis_service.get_messages_by_autoKey_async(session_id, auto_key)
+        full = await _measure("\n".join(chat_history.format_turn(m) for m in messages))
+
+        start = time.perf_counter()
+        history_text = await chat_history.build_auto_history(session_id, auto_key)
+        build = time.perf_counter() - start
+        tokens, latency = await _measure(history_text)
+        return full, (tokens, latency + build), summary_calls
+    finally:
+        key = f"session:{session_id}:auto:{auto_key}"
+        await redis_service.ar.delete(f"session:{session_id}:messages", key, f"{key}:summary")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument("--delay", type=float, default=0.05, help="stub LLM latency in seconds")
+    parser.add_argument("--fake-redis", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["CEREBRAS_BASE_URL"] = stub_llm.start(args.delay)
+    if args.fake_redis:
+        common.use_fake_redis()
+
+    async def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            await _measure("warm up")  # client connection setup is not part of either path
+        print(f"{'turns':>6} {'full tokens':>12} {'full latency':>13} {'window tokens':>14} {'window latency':>15} {'summary calls':>14}")
+        for length in args.lengths:
+            with contextlib.redirect_stdout(io.StringIO()):
+                (full_tokens, full_latency), (window_tokens, window_latency), summary_calls = await _conversation(length)
+            print(f"{length:>6} {full_tokens:>12} {full_latency * 1000:>11.1f}ms {window_tokens:>14} {window_latency * 1000:>13.1f}ms {summary_calls:>14}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
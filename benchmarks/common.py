@@ -0,0 +1,31 @@
+"""
+Shared setup for the benchmark scripts: repo import path, environment
+defaults, and an optional in-memory Redis for runs without a server.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("CEREBRAS_API_KEY", "benchmark")
+os.environ.setdefault("REDIS_HOST", "redis://localhost:6379/0?decode_responses=True")
+
+
+def use_fake_redis():
+    """
+    Point redis_service (and the broadcast client) at fakeredis. Timings then
+    measure the app code only, not a Redis round-trip.
+    """
+    import fakeredis
+    import fakeredis.aioredis
+    from services import broadcast_service, redis_service
+
+    server = fakeredis.FakeServer()
+    redis_service.r = fakeredis.FakeRedis(server=server, decode_responses=True)
+    redis_service.r_raw = fakeredis.FakeRedis(server=server)
+    redis_service.ar = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    broadcast_service._client = redis_service.ar
+
+
+def report(name: str, count: int, seconds: float, unit: str = "req"):
+    print(f"{name:<40} {count:>7} {unit} in {seconds:7.3f}s  {count / seconds:10.1f} {unit}/s")
@@ -0,0 +1,64 @@
+"""
+Embedding throughput (user-006): one encode call per text, as the handlers
+originally did, vs concurrent get_embedding_async() callers coalesced by the
+micro-batching queue, vs a single get_embeddings() call as the upper bound.
+Every phase uses fresh texts so the embedding cache never answers.
+
+    python benchmarks/embedding_batching.py --texts 512 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import common
+
+# Measure the model, not the cache or worker processes
+os.environ.setdefault("EMBEDDING_CACHE_REDIS", "false")
+os.environ.setdefault("EMBEDDING_WORKERS", "0")
+
+from services import embedding_service  # noqa: E402
+
+
+def _texts(tag: str, count: int) -> list[str]:
+    return [f"{tag} guest message {i}: can we move the meeting to thursday afternoon?" for i in range(count)]
+
+
+async def _batched(texts: list[str], concurrency: int):
+    # Bursts of `concurrency` guests typing at once
+    for start in range(0, len(texts), concurrency):
+        await asyncio.gather(*(embedding_service.get_embedding_async(t) for t in texts[start:start + concurrency]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    embedding_service.warm_up()
+
+    texts = _texts("single", args.texts)
+    start = time.perf_counter()
+    for text in texts:
+        embedding_service.get_embedding(text)
+    single = time.perf_counter() - start
+    common.report("single encode per text", args.texts, single, "texts")
+
+    texts = _texts("queue", args.texts)
+    start = time.perf_counter()
+    asyncio.run(_batched(texts, args.concurrency))
+    batched = time.perf_counter() - start
+    common.report(f"micro-batched async (x{args.concurrency})", args.texts, batched, "texts")
+
+    texts = _texts("bulk", args.texts)
+    start = time.perf_counter()
+    embedding_service.get_embeddings(texts)
+    bulk = time.perf_counter() - start
+    common.report("one get_embeddings() call", args.texts, bulk, "texts")
+
+    print(f"micro-batching speed-up: {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
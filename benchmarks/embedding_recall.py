@@ -0,0 +1,158 @@
+"""
+Embedding backend check (user-019): PyTorch vs ONNX Runtime vs int8-quantized
+ONNX on a fixed corpus of memory-like sentences.
+
+  * cosine       - similarity of each text's embedding to the PyTorch one
+  * top-k recall - overlap of get_relevant_memories() results with the PyTorch
+                   results, both for memories stored with PyTorch embeddings and
+                   queried with the new backend (a switch without re-embedding)
+                   and for memories re-embedded with the new backend
+  * throughput   - encode texts/s
+
+Needs sentence-transformers and, for the ONNX backends, optimum[onnxruntime].
+
+    python benchmarks/embedding_recall.py --top-n 3 --repeat 20 [--fake-redis]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+import common
+
+os.environ.setdefault("EMBEDDING_CACHE_REDIS", "false")
+os.environ.setdefault("EMBEDDING_WORKERS", "0")
+
+from services import embedding_service  # noqa: E402
+
+CORPUS = [
+    "Loves spicy Thai food, especially green curry",
+    "Is vegetarian and avoids fish",
+    "Allergic to peanuts",
+    "Prefers tea over coffee in the morning",
+    "Supports FC Barcelona and watches every match",
+    "Plays tennis on weekends",
+    "Runs half marathons twice a year",
+    "Reading the Three-Body Problem trilogy",
+    "Enjoys historical fiction novels about Rome",
+    "Learning to play jazz piano",
+    "Listens to lo-fi hip hop while working",
+    "Works as a backend engineer at a fintech startup",
+    "Commutes by bike across the city",
+    "Has a golden retriever named Max",
+    "Is planning a trip to Kyoto in April",
+    "Prefers window seats on flights",
+    "Stays in boutique hotels rather than chains",
+    "Speaks Spanish and is learning Japanese",
+    "Birthday is on the 14th of March",
+    "Daughter starts primary school this autumn",
+    "Grows tomatoes and basil on the balcony",
+    "Collects vintage film cameras",
+    "Meditates for ten minutes every evening",
+    "Dislikes crowded places and loud bars",
+    "Prefers meetings in the afternoon",
+    "Drives an electric car",
+    "Volunteers at the local food bank on Saturdays",
+    "Favourite dessert is tiramisu",
+    "Avoids caffeine after 3pm",
+    "Wants to visit Patagonia for hiking",
+]
+QUERIES = [
+    "Can you recommend a restaurant for dinner tonight?",
+    "What should we do this weekend?",
+    "Any good book suggestions?",
+    "When is a good time to schedule the call?",
+    "I'm booking flights for the holiday",
+    "Where should we stay in Japan?",
+    "Do you want to grab a coffee?",
+    "Let's watch the football game",
+    "What gift should I buy for their birthday?",
+    "Any plans for the garden this year?",
+]
+BACKENDS = [("torch", "torch", False), ("onnx", "onnx", False), ("onnx int8", "onnx", True)]
+
+
+def _load(backend: str, quantize: bool):
+    # Same selection path as EMBEDDING_BACKEND / EMBEDDING_QUANTIZE at startup
+    embedding_service.EMBEDDING_BACKEND = backend
+    embedding_service.EMBEDDING_QUANTIZE = quantize
+    embedding_service._model = None
+    embedding_service.warm_up()
+
+
+def _store(user_id: str, embeddings: np.ndarray):
+    from services import redis_service
+    redis_service.delete_memories(user_id)
+    redis_service.save_memories(user_id, [
+        redis_service.prepare_memory(text, user_id, embedding.tolist(), memory_id=f"m{i:02d}")
+        for i, (text, embedding) in enumerate(zip(CORPUS, embeddings))
+    ])
+
+
+def _top_k(user_id: str, queries: np.ndarray, top_n: int) -> list[set]:
+    from services import redis_service
+    return [{m["id"] for m in redis_service.get_relevant_memories(user_id, q.tolist(), top_n)} for q in queries]
+
+
+def _overlap(results: list[set], reference: list[set]) -> float:
+    return float(np.mean([len(a & b) / len(b) for a, b in zip(results, reference) if b]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20, help="corpus copies encoded for the throughput run")
+    parser.add_argument("--fake-redis", action="store_true")
+    args = parser.parse_args()
+
+    if args.fake_redis:
+        common.use_fake_redis()
+    from services import redis_service
+
+    # The memory top-k runs in-process regardless of MEMORY_SEARCH_BACKEND
+    redis_service.MEMORY_SEARCH_BACKEND = "local"
+
+    results = {}
+    for name, backend, quantize in BACKENDS:
+        try:
+            _load(backend, quantize)
+        except Exception as e:
+            print(f"{name:<10} skipped: {type(e).__name__}: {e}")
+            continue
+        corpus = embedding_service._encode(CORPUS)
+        queries = embedding_service._encode(QUERIES)
+        texts = CORPUS * args.repeat
+        start = time.perf_counter()
+        embedding_service._encode(texts)
+        results[name] = (corpus, queries, len(texts) / (time.perf_counter() - start))
+
+    if "torch" not in results:
+        print("The torch backend is the reference and did not load")
+        return
+
+    users = {"torch": "bench-recall-torch"}
+    try:
+        torch_corpus, torch_queries, _ = results["torch"]
+        _store(users["torch"], torch_corpus)
+        reference = _top_k(users["torch"], torch_queries, args.top_n)
+
+        print(f"{'backend':<10} {'cosine min':>10} {'cosine mean':>12} {'top-k, torch store':>19} {'top-k, re-embedded':>19} {'texts/s':>9}")
+        for name, (corpus, queries, throughput) in results.items():
+            both = np.vstack([corpus, queries])
+            reference_both = np.vstack([torch_corpus, torch_queries])
+            cosine = np.sum(both * reference_both, axis=1) / (
+                np.linalg.norm(both, axis=1) * np.linalg.norm(reference_both, axis=1) + 1e-8
+            )
+            users[name] = f"bench-recall-{name.replace(' ', '-')}"
+            _store(users[name], corpus)
+            mixed = _overlap(_top_k(users["torch"], queries, args.top_n), reference)
+            reembedded = _overlap(_top_k(users[name], queries, args.top_n), reference)
+            print(f"{name:<10} {cosine.min():>10.4f} {cosine.mean():>12.4f} {mixed:>19.0%} {reembedded:>19.0%} {throughput:>9.1f}")
+    finally:
+        for user_id in users.values():
+            redis_service.delete_memories(user_id)
+
+
+if __name__ == "__main__":
+    main()
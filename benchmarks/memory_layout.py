@@ -0,0 +1,121 @@
+"""
+Memory edit/delete/get-by-id at 10k memories per user (user-014): the legacy
+JSON list, scanned and rewritten with LSET/LREM as the old edit_memory and
+delete_memory did, vs the hash-per-memory layout. Also times the one-off
+migration of a legacy list.
+
+    python benchmarks/memory_layout.py --memories 10000 --ops 50 [--fake-redis]
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+import common
+from config import EMBEDDING_DIM
+
+USER_ID = "bench-memory-layout"
+
+
+def _legacy_key() -> str:
+    from services import redis_service
+    return f"{redis_service.LEGACY_MEMORY_KEY_PREFIX}{USER_ID}"
+
+
+def _legacy_get(memory_id: str):
+    from services import redis_service
+    for mem in redis_service.r.lrange(_legacy_key(), 0, -1):
+        mem_dict = json.loads(mem)
+        if mem_dict["id"] == memory_id:
+            return mem_dict
+    return None
+
+
+def _legacy_edit(memory_id: str, new_message: str) -> bool:
+    from services import redis_service
+    key = _legacy_key()
+    for idx, mem in enumerate(redis_service.r.lrange(key, 0, -1)):
+        mem_dict = json.loads(mem)
+        if mem_dict["id"] == memory_id:
+            mem_dict["message"] = new_message
+            redis_service.r.lset(key, idx, json.dumps(mem_dict))
+            return True
+    return False
+
+
+def _legacy_delete(memory_id: str) -> bool:
+    from services import redis_service
+    key = _legacy_key()
+    for mem in redis_service.r.lrange(key, 0, -1):
+        if json.loads(mem)["id"] == memory_id:
+            redis_service.r.lrem(key, 1, mem)
+            return True
+    return False
+
+
+def _fill_legacy(count: int) -> list[str]:
+    from services import redis_service
+    rng = np.random.default_rng(0)
+    ids = [f"mem-{i:06d}" for i in range(count)]
+    pipe = redis_service.r.pipeline(transaction=False)
+    for start in range(0, count, 1000):
+        pipe.rpush(_legacy_key(), *[
+            json.dumps({"id": memory_id, "user_id": USER_ID, "message": f"memory {memory_id}", "summary": f"memory {memory_id}",
+                        "timestamp": "2025-01-01T00:00:00Z", "embedding": rng.standard_normal(EMBEDDING_DIM).round(6).tolist()})
+            for memory_id in ids[start:start + 1000]
+        ])
+    pipe.execute()
+    return ids
+
+
+def _split(sample: list[str], ops: int):
+    return sample[:ops], sample[ops:ops * 2], sample[ops * 2:]
+
+
+def _time_ops(name: str, fn, ids: list[str]):
+    start = time.perf_counter()
+    for memory_id in ids:
+        assert fn(memory_id), memory_id
+    common.report(name, len(ids), time.perf_counter() - start, "ops")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memories", type=int, default=10000)
+    parser.add_argument("--ops", type=int, default=50)
+    parser.add_argument("--fake-redis", action="store_true")
+    args = parser.parse_args()
+
+    if args.fake_redis:
+        common.use_fake_redis()
+    from services import redis_service
+
+    redis_service.delete_memories(USER_ID)
+    try:
+        ids = _fill_legacy(args.memories)
+        rng = random.Random(0)
+        get_ids, edit_ids, delete_ids = _split(rng.sample(ids, args.ops * 3), args.ops)
+
+        print(f"{args.memories} memories, legacy JSON list")
+        _time_ops("  get by id (scan)", _legacy_get, get_ids)
+        _time_ops("  edit (scan + LSET)", lambda m: _legacy_edit(m, "edited"), edit_ids)
+        _time_ops("  delete (scan + LREM)", _legacy_delete, delete_ids)
+
+        start = time.perf_counter()
+        moved = redis_service.migrate_memory_layout(USER_ID)
+        common.report("migrate to hash layout", moved, time.perf_counter() - start, "mem")
+
+        deleted = set(delete_ids)
+        get_ids, edit_ids, delete_ids = _split(rng.sample([m for m in ids if m not in deleted], args.ops * 3), args.ops)
+        print(f"{moved} memories, hash per memory")
+        _time_ops("  get by id (HGETALL)", lambda m: redis_service.get_memory(USER_ID, m), get_ids)
+        _time_ops("  edit (WATCH + HSET)", lambda m: redis_service.edit_memory(USER_ID, m, "edited"), edit_ids)
+        _time_ops("  delete (DEL + ZREM)", lambda m: redis_service.delete_memory(USER_ID, m), delete_ids)
+    finally:
+        redis_service.delete_memories(USER_ID)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Memory retrieval microbenchmark (user-002): the original per-memory Python
+cosine loop vs the vectorized NumPy matrix + argpartition top-k, on random
+embeddings. Matrix build time is reported separately since it is cached
+per user.
+
+    python benchmarks/memory_topk.py --sizes 1000 10000 100000 --top-n 3
+"""
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (import path and env defaults)
+from config import EMBEDDING_DIM
+from services.redis_service import _build_memory_matrix, _top_k_indices
+
+
+def _python_top_k(memories, query, top_n):
+    def cosine(a, b):
+        return sum(x * y for x, y in zip(a, b)) / (
+            (sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5) + 1e-8
+        )
+    scored = sorted(((mem, cosine(query, mem["embedding"])) for mem in memories), key=lambda x: x[1], reverse=True)
+    return [mem["id"] for mem, _ in scored[:top_n]]
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--python-limit", type=int, default=100000, help="skip the pure-Python loop above this size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'memories':>9} {'python loop':>12} {'matrix build':>13} {'numpy top-k':>12} {'speed-up':>9}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+        memories = [{"id": str(i), "message": str(i), "embedding": vectors[i]} for i in range(size)]
+        query = rng.standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+        build, (valid, matrix) = _timed(lambda: _build_memory_matrix(memories), 1)
+        repeat = max(1, 100000 // size)
+        numpy_time, indices = _timed(lambda: _top_k_indices(matrix, query, args.top_n), repeat)
+        numpy_ids = [valid[i]["id"] for i in indices]
+
+        if size <= args.python_limit:
+            lists = [{"id": m["id"], "embedding": m["embedding"].tolist()} for m in memories]
+            python_time, python_ids = _timed(lambda: _python_top_k(lists, query.tolist(), args.top_n), 1)
+            assert python_ids == numpy_ids, (python_ids, numpy_ids)
+            print(f"{size:>9} {python_time * 1000:>10.1f}ms {build * 1000:>11.1f}ms {numpy_time * 1000:>10.3f}ms {python_time / numpy_time:>8.0f}x")
+        else:
+            print(f"{size:>9} {'skipped':>12} {build * 1000:>11.1f}ms {numpy_time * 1000:>10.3f}ms {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
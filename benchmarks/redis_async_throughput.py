@@ -0,0 +1,74 @@
+"""
+Message throughput with many concurrent sessions (user-012): the blocking
+redis client called from coroutines (the old WebSocket path) vs the async
+pooled client. Each message does what a chat turn does in Redis: read the
+session, append the message, read the recent history.
+
+Run it against a real Redis; with --fake-redis there is no network latency
+to overlap, so the numbers only show that the code paths work.
+
+    python benchmarks/redis_async_throughput.py --sessions 200 --messages 20
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import common
+
+
+async def _session_blocking(session_id: str, messages: int):
+    from services import redis_service
+    for i in range(messages):
+        redis_service.get_session(session_id)
+        redis_service.save_message(session_id, "guest", f"message {i}", f"mensaje {i}", False, None)
+        redis_service.get_recent_messages(session_id)
+
+
+async def _session_async(session_id: str, messages: int):
+    from services import redis_service
+    for i in range(messages):
+        await redis_service.get_session_async(session_id)
+        await redis_service.save_message_async(session_id, "guest", f"message {i}", f"mensaje {i}", False, None)
+        await redis_service.get_recent_messages_async(session_id)
+
+
+async def _run(session, session_ids: list[str], messages: int) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*[session(session_id, messages) for session_id in session_ids])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--fake-redis", action="store_true")
+    args = parser.parse_args()
+
+    if args.fake_redis:
+        common.use_fake_redis()
+    from services import redis_service
+
+    sessions = {tag: [f"bench-redis-{tag}-{n}" for n in range(args.sessions)] for tag in ("blocking", "async")}
+    for session_ids in sessions.values():
+        for session_id in session_ids:
+            redis_service.save_session(session_id, {"host_language": "English", "guest_language": "Spanish"})
+
+    count = args.sessions * args.messages
+    try:
+        blocking = asyncio.run(_run(_session_blocking, sessions["blocking"], args.messages))
+        common.report("blocking client in event loop", count, blocking, "msg")
+        concurrent = asyncio.run(_run(_session_async, sessions["async"], args.messages))
+        common.report("async pooled client", count, concurrent, "msg")
+        print(f"speed-up: {blocking / concurrent:.1f}x")
+    finally:
+        for session_ids in sessions.values():
+            for session_id in session_ids:
+                redis_service.r.delete(f"session:{session_id}", f"session:{session_id}:messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Worker startup time (user-018). Each run starts a fresh interpreter and times:
+
+  * import main            - what uvicorn does before it can accept connections
+  * import main + eager    - the same with the Cerebras SDK and sentence_transformers
+                             imported up front, as the services used to
+  * warm-up                - embedding_service.warm_up(): model load plus one encode,
+                             the time until /ready turns 200
+
+    python benchmarks/startup_time.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+import common  # noqa: F401  (environment defaults for the child processes)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SNIPPET = """
+import time
+start = time.perf_counter()
+{eager}
+import main
+imported = time.perf_counter() - start
+{warm}
+print(imported, time.perf_counter() - start)
+"""
+_EAGER = "import cerebras.cloud.sdk, sentence_transformers"
+_WARM = "from services import embedding_service; embedding_service.warm_up()"
+
+
+def _run(eager: bool, warm: bool) -> tuple[float, float]:
+    code = _SNIPPET.format(eager=_EAGER if eager else "", warm=_WARM if warm else "")
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=os.environ, check=True, capture_output=True, text=True)
+    imported, total = out.stdout.strip().splitlines()[-1].split()
+    return float(imported), float(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-warm-up", action="store_true", help="skip the run that loads the model")
+    args = parser.parse_args()
+
+    rows = [("import main", False, False), ("import main + eager SDK imports", True, False)]
+    if not args.skip_warm_up:
+        rows.append(("import main + warm-up", False, True))
+
+    print(f"{'':<34} {'median':>9} {'min':>9} {'max':>9}   (seconds, {args.runs} runs)")
+    for name, eager, warm in rows:
+        times = [_run(eager, warm)[1] for _ in range(args.runs)]
+        print(f"{name:<34} {statistics.median(times):>9.3f} {min(times):>9.3f} {max(times):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
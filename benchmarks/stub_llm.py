@@ -0,0 +1,103 @@
+"""
+Stub Cerebras (OpenAI-compatible) chat completions server for benchmarks.
+
+Every request sleeps for `delay` seconds to stand in for model latency, then
+returns a canned answer shaped by the request's json_schema name. Streaming
+requests get SSE chunks. prompt_tokens is approximated as characters / 4.
+
+    python benchmarks/stub_llm.py --port 8100 --delay 0.2
+    CEREBRAS_BASE_URL=http://127.0.0.1:8100 uvicorn main:app
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+stats = {"requests": 0, "prompt_tokens": []}
+_stats_lock = threading.Lock()
+
+
+def _content(request: dict) -> str:
+    name = ((request.get("response_format") or {}).get("json_schema") or {}).get("name")
+    if name == "auto_reply_schema":
+        return json.dumps({"reply": "Thanks, anything else I can help with?", "end_chat": False})
+    if name == "chat_suggestions_schema":
+        return json.dumps({"chat_suggestions": ["Sure!", "Tell me more", "Thank you"]})
+    if name == "contextual_memories_schema":
+        count = len(json.loads(request["messages"][-1]["content"]))
+        return json.dumps({"memories": [f"stub memory {i}" for i in range(count)]})
+    if name == "slate_translate_schema":
+        return json.dumps({"host_language": "stub host", "guest_language": "stub guest", "memory_backed": False})
+    return "stub translation"
+
+
+def _prompt_tokens(request: dict) -> int:
+    return sum(len(m.get("content") or "") for m in request.get("messages", [])) // 4
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 would throttle concurrent clients
+
+
+class _Handler(BaseHTTPRequestHandler):
+    delay = 0.2
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt_tokens = _prompt_tokens(request)
+        with _stats_lock:
+            stats["requests"] += 1
+            stats["prompt_tokens"].append(prompt_tokens)
+        time.sleep(self.delay)
+        content = _content(request)
+        base = {"id": "stub", "created": int(time.time()), "model": request.get("model", "stub")}
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4, "total_tokens": prompt_tokens + len(content) // 4}
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else " " + word}
+                chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            last = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode())
+            return
+
+        body = json.dumps({
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start(delay: float = 0.2, port: int = 0) -> str:
+    """
+    Serve in a background thread and return the base URL.
+    """
+    handler = type("Handler", (_Handler,), {"delay": delay})
+    server = _Server(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+    print(f"Stub LLM listening on {start(args.delay, args.port)} (delay {args.delay}s)")
+    threading.Event().wait()
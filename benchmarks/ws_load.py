@@ -0,0 +1,67 @@
+"""
+Chat-loop load benchmark against the stub LLM server (user-001).
+
+Runs N concurrent sessions on one event loop, each sending M messages through
+translate + suggestions, once with the blocking Cerebras client (what the
+WebSocket loop used to call) and once with the async client.
+
+    python benchmarks/ws_load.py --sessions 50 --messages 4 --delay 0.2 [--fake-redis]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+import common
+import stub_llm
+
+
+async def _session_blocking(session_id: str, messages: int):
+    from services import redis_service, translation_service
+    for i in range(messages):
+        text = f"{session_id} message {i}"
+        translated = translation_service.translate(text, "English", "Spanish", use_cache=False)
+        redis_service.save_message(session_id, "guest", text, translated.translated_text, False, None)
+        translation_service.generate_suggestions(session_id, "host", "English", [])
+
+
+async def _session_async(session_id: str, messages: int):
+    from services import redis_service, translation_service
+    for i in range(messages):
+        text = f"{session_id} message {i}"
+        translated = await translation_service.translate_async(text, "English", "Spanish", use_cache=False)
+        await redis_service.save_message_async(session_id, "guest", text, translated.translated_text, False, None)
+        await translation_service.generate_suggestions_async(session_id, "host", "English", [])
+
+
+async def _run(session, sessions: int, messages: int, tag: str) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the services log every call
+        await asyncio.gather(*[session(f"{tag}-{n}", messages) for n in range(sessions)])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.2, help="stub LLM latency in seconds")
+    parser.add_argument("--fake-redis", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["CEREBRAS_BASE_URL"] = stub_llm.start(args.delay)
+    if args.fake_redis:
+        common.use_fake_redis()
+
+    calls = args.sessions * args.messages * 2
+    blocking = asyncio.run(_run(_session_blocking, args.sessions, args.messages, "blocking"))
+    common.report("blocking client in event loop", calls, blocking)
+    concurrent = asyncio.run(_run(_session_async, args.sessions, args.messages, "async"))
+    common.report("async client", calls, concurrent)
+    print(f"speed-up: {blocking / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,20 @@ export function MemoriesTab({ userId }: { userId: string }) {
     fetchMemories();
   }, []);
 
+  // Memories are saved by a background job; wait until it has finished
+  const waitForMemoryJob = async (jobId: string) => {
+    for (let attempt = 0; attempt < 60; attempt++) {
+      const res = await fetch(`${RENDER_API_BASE_URL}/memory/jobs/${jobId}`);
+      if (res.ok) {
+        const job = await res.json();
+        if (job.status === "done") return;
+        if (job.status === "failed") throw new Error(job.error);
+      }
+      await new Promise((resolve) => setTimeout(resolve, 500));
+    }
+    throw new Error("Timed out waiting for memory job");
+  };
+
   // ✅ Add memory (reload with skeleton)
   const addMemory = async () => {
     if (!newMemory.trim()) return;
@@ -64,6 +78,7 @@ export function MemoriesTab({ userId }: { userId: string }) {
       const data = await res.json();
       if (data.status === "success") {
         setNewMemory("");
+        await waitForMemoryJob(data.job_id);
         await fetchMemories(); // refresh enriched memories
         toast.success("Added to memories.", {
           description: "Success",
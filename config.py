@@ -8,4 +8,66 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 12 * 60 * 60))
 
 CEREBRAS_API_URL = os.getenv("CEREBRAS_API_URL")
-CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY")
\ No newline at end of file
+CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY")
+
+# Per-user memory embedding matrices kept in-process (LRU)
+MEMORY_INDEX_CACHE_SIZE = int(os.getenv("MEMORY_INDEX_CACHE_SIZE", 256))
+
+# Memory retrieval backend: "local" (in-process scan) or "redisearch" (Redis KNN index)
+MEMORY_SEARCH_BACKEND = os.getenv("MEMORY_SEARCH_BACKEND", "local")
+MEMORY_VECTOR_ALGORITHM = os.getenv("MEMORY_VECTOR_ALGORITHM", "HNSW")  # or "FLAT"
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 384))
+
+# Micro-batching for async embedding requests
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 5))
+
+# Embedding cache: in-process LRU, optionally backed by Redis
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 4096))
+EMBEDDING_CACHE_REDIS = os.getenv("EMBEDDING_CACHE_REDIS", "true").lower() == "true"
+EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+
+# Translation cache: in-process LRU in front of Redis
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 4096))
+TRANSLATION_CACHE_TTL_SECONDS = int(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", 24 * 60 * 60))
+
+# Async Redis pool used by the WebSocket path
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 100))
+
+# Coalesce chat message appends for this long before flushing (0 = write immediately)
+MESSAGE_WRITE_BEHIND_MS = float(os.getenv("MESSAGE_WRITE_BEHIND_MS", 0))
+
+# Background memory ingestion (/memory/save)
+MEMORY_JOB_WORKERS = int(os.getenv("MEMORY_JOB_WORKERS", 1))
+MEMORY_JOB_BATCH_SIZE = int(os.getenv("MEMORY_JOB_BATCH_SIZE", 16))
+MEMORY_JOB_TTL_SECONDS = int(os.getenv("MEMORY_JOB_TTL_SECONDS", 24 * 60 * 60))
+# Jobs claimed longer than this without an ack (crashed worker) are put back on the queue
+MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS", 300))
+
+# Bulk memory import: concurrent summary calls and messages embedded/saved per round
+MEMORY_SUMMARY_CONCURRENCY = int(os.getenv("MEMORY_SUMMARY_CONCURRENCY", 4))
+MEMORY_IMPORT_BATCH_SIZE = int(os.getenv("MEMORY_IMPORT_BATCH_SIZE", 256))
+
+# Load and run the embedding model at startup; /ready reports 503 until done
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() == "true"
+
+# Embedding backend: "torch" (default) or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Use the int8 dynamically quantized ONNX export (onnx backend only)
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "false").lower() == "true"
+# Override the ONNX file inside the model repo, e.g. "onnx/model_qint8_avx512.onnx"
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE")
+
+# Out-of-process embedding workers, each holding its own model: 0 = encode in the API process, "auto" = one per core
+_embedding_workers = os.getenv("EMBEDDING_WORKERS", "0")
+EMBEDDING_WORKERS = (os.cpu_count() or 1) if _embedding_workers == "auto" else int(_embedding_workers)
+
+# QR codes: pre-generated session pool size (0 = off)
+QR_POOL_SIZE = int(os.getenv("QR_POOL_SIZE", 32))
+
+# Auto-reply history: turns kept verbatim, and how many older turns to fold into the summary at once
+AUTO_HISTORY_WINDOW = int(os.getenv("AUTO_HISTORY_WINDOW", 10))
+AUTO_HISTORY_SUMMARY_CHUNK = int(os.getenv("AUTO_HISTORY_SUMMARY_CHUNK", 10))
+
+# Broadcast presence: a worker's socket counts expire this long after its last heartbeat
+PRESENCE_TTL_SECONDS = int(os.getenv("PRESENCE_TTL_SECONDS", 30))
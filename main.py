@@ -1,15 +1,65 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import memory, session, slate_endpoint
+from fastapi.responses import JSONResponse
+from config import EMBEDDING_WARMUP, MEMORY_JOB_WORKERS
+from routers import memory, metrics, session, slate_endpoint
 from routers import ws_chat
+from services import embedding_service, memory_jobs, qr_generator, redis_service
 from starlette.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="QR Chat Translator MVP")
+
+def _log_warm_up(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[ERROR] Embedding warm-up failed, the model will load on first use: {task.exception()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the embedding model in the background so the port opens immediately
+    warm_up = asyncio.create_task(asyncio.to_thread(embedding_service.warm_up)) if EMBEDDING_WARMUP else None
+    if warm_up is not None:
+        warm_up.add_done_callback(_log_warm_up)
+    # Pre-render session QR codes for burst check-ins
+    qr_generator.schedule_refill(session.BASE_URL)
+    # Background memory ingestion workers
+    workers = [asyncio.create_task(memory_jobs.run_memory_worker()) for _ in range(MEMORY_JOB_WORKERS)]
+    yield
+    # Write out any chat messages still held by the write-behind buffer
+    try:
+        await redis_service.flush_pending_messages()
+    except Exception as e:
+        print(f"[ERROR] Flushing buffered messages on shutdown failed: {e}")
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    embedding_service.shutdown()
+
+
+app = FastAPI(title="QR Chat Translator MVP", lifespan=lifespan)
 
 # Include routers
 app.include_router(session.router, prefix="/api/v1")
 app.include_router(ws_chat.router, prefix="/api/v1")
 app.include_router(memory.router, prefix="/api/v1")
 app.include_router(slate_endpoint.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 503 until the embedding model is warm (when warm-up is enabled).
+    If warm-up failed it reports the error until a lazy load on first use succeeds.
+    """
+    if EMBEDDING_WARMUP and not embedding_service.is_warm():
+        error = embedding_service.get_warm_up_error()
+        if error is not None:
+            return JSONResponse(status_code=503, content={"status": "warm_up_failed", "error": error})
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready"}
 
 # Dev-only: allow all origins for WebSocket and HTTP
 app.add_middleware(
@@ -18,4 +68,4 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
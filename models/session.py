@@ -1,13 +1,17 @@
+from typing import Literal
 from pydantic import BaseModel
 
 class SessionCreateRequest(BaseModel):
     host_language: str  # e.g., "en"
     target_language: str  # e.g., "es"
     mode: str = "auto"  # "auto" or "confirm"
+    translation_cache: bool = True  # False to always get fresh translations
+    qr_format: Literal["png", "svg"] = "png"
 
 class SessionCreateResponse(BaseModel):
     session_id: str
     short_url: str
     qr_base64: str
+    qr_format: str = "png"
     expires_at: str
 
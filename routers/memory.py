@@ -1,11 +1,12 @@
 
-from http.client import HTTPException
-from typing import Dict, List
+import json
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
-from fastapi import APIRouter
-from services.redis_service import delete_memory, edit_memory, prepare_memory, save_memory,get_memories
-from services.translation_service import get_contextual_memory
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from services.redis_service import MEMORY_FIELDS, delete_memory, edit_memory, get_memories_page, iter_memories
+from services.memory_jobs import enqueue_memory_job, get_memory_job, import_memories
 
 router = APIRouter()
 
@@ -20,22 +21,68 @@ class MemoryDeleteRequest(BaseModel):
 
 @router.post("/memory/save")
 def save_memory_endpoint(payload: dict):
+    """
+    Queue a message to be summarized, embedded and saved as a memory.
+    Poll /memory/jobs/{job_id} for completion.
+    """
     user_id = payload["user_id"]
     message = payload["message"]
-    memory_sentence = get_contextual_memory(message)
-    memory_obj = prepare_memory(memory_sentence, user_id)
-    save_memory(user_id, memory_obj)
-    return {"status": "success", "saved_message": message}
+    job_id = enqueue_memory_job(user_id, message)
+    return {"status": "success", "job_id": job_id, "job_status": "queued", "saved_message": message}
+
+@router.post("/memory/import/{user_id}")
+async def import_memories_endpoint(user_id: str, request: Request):
+    """
+    Bulk-import memories from an NDJSON body, one {"message": "..."} per line.
+    The body is read as a stream and processed in batches.
+    """
+    result = await import_memories(user_id, request.stream())
+    return {"status": "success", "user_id": user_id, **result}
+
+@router.get("/memory/jobs/{job_id}")
+def memory_job_status(job_id: str):
+    job = get_memory_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.get("/memory/{user_id}")
-def fetch_memories(user_id: str):
+def fetch_memories(
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    fields: str = "id,message,summary,timestamp",
+    stream: bool = False,
+):
     print(f"Fetching memories for user : {user_id}")
     """
-    Fetch all saved memories for a user based on user id
+    Fetch saved memories for a user based on user id. Without `cursor` or
+    `limit` every memory is returned; with either, one page at a time (50 by default).
+    `fields` is a comma-separated projection (add "embedding" to include vectors);
+    `stream=true` returns every memory as NDJSON instead of a page.
     """
-    memories = get_memories(user_id)
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(selected) - set(MEMORY_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    if "id" not in selected:
+        selected.insert(0, "id")
+
+    if stream:
+        lines = (json.dumps(memory) + "\n" for memory in iter_memories(user_id, selected))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    if cursor is None and limit is None:
+        memories = list(iter_memories(user_id, selected))
+        print(f"Memories length: {len(memories)}")
+        return {"user_id": user_id, "memories": memories, "next_cursor": None}
+
+    try:
+        memories, next_cursor = get_memories_page(user_id, cursor, limit or 50, selected)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     print(f"Memories length: {len(memories)}")
-    return {"user_id": user_id, "memories": memories}
+    return {"user_id": user_id, "memories": memories, "next_cursor": next_cursor}
 
 @router.put("/memory/edit")
 def edit_memory_endpoint(request: MemoryEditRequest):
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from services import embedding_service, redis_service, translation_service
+
+router = APIRouter()
+
+@router.get("/metrics")
+def get_metrics():
+    """
+    In-process cache counters for this worker.
+    """
+    return {
+        "memory_index_cache": redis_service.get_memory_index_stats(),
+        "embedding_cache": embedding_service.get_embedding_cache_stats(),
+        "translation_cache": translation_service.get_translation_cache_stats(),
+        "prompt_tokens": translation_service.get_prompt_token_stats(),
+        "llm_single_flight": translation_service.get_single_flight_stats(),
+    }
@@ -11,21 +11,23 @@ BASE_URL = "http://localhost:3000/s"  # Frontend URL
 @router.post("/sessions", response_model=SessionCreateResponse)
 def create_session(request: SessionCreateRequest):
     print(request.dict())
-    session_id = str(uuid.uuid4())
+    # PNG sessions take a pre-rendered id + QR when one is available
+    pregenerated = qr_generator.take_pregenerated(BASE_URL) if request.qr_format == "png" else None
+    session_id = pregenerated[0] if pregenerated else str(uuid.uuid4())
 
     # Store in Redis with TTL
-    redis_service.save_session(session_id, {
+    ttl = redis_service.save_session(session_id, {
         "host_language": request.host_language,
         "target_language": request.target_language,
-        "mode": request.mode
+        "mode": request.mode,
+        "translation_cache": int(request.translation_cache)
     })
 
     # Short URL & QR
     short_url = f"{BASE_URL}/{session_id}"
-    qr_base64 = qr_generator.generate_qr_base64(short_url)
+    qr_base64 = pregenerated[1] if pregenerated else qr_generator.generate_qr_base64(short_url, request.qr_format)
 
     # Safe TTL handling
-    ttl = redis_service.r.ttl(f"session:{session_id}")
     if ttl is None or ttl < 0:
         ttl = 43200  # fallback 12 hours
     expires_at = (datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl)).isoformat() + "Z"
@@ -34,5 +36,6 @@ def create_session(request: SessionCreateRequest):
         session_id=session_id,
         short_url=short_url,
         qr_base64=qr_base64,
+        qr_format=request.qr_format,
         expires_at=expires_at
     )
@@ -1,26 +1,97 @@
+import asyncio
 import json
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from services import redis_service, translation_service
-from services.embedding_service import get_embedding
+from models.translation import TranslationResponse
+from services import broadcast_service, chat_history, redis_service, translation_service
+from services.embedding_service import get_embedding_async
 
 router = APIRouter()
-connections = {}  # session_id -> list of (websocket, role)
+
+# Latest in-flight suggestion task per session on this node; a newer message cancels it
+_suggestion_tasks = {}
+
+
+async def _retrieve_memories(user_id: str, text: str) -> list[str]:
+    print(f"Getting embedding for : {text}")
+    query_embedding = await get_embedding_async(text)
+    relevant_memories = await asyncio.to_thread(redis_service.get_relevant_memories, user_id, query_embedding, 3)
+    print(f"user id:{user_id}")
+    print(f"Relevant memories:{relevant_memories}")
+    return [memory["message"] for memory in relevant_memories]
+
+
+async def _send_suggestions(session_id: str, message_id: str, conn_role: str, target: str, agent_memories: list[str]):
+    suggestions = await translation_service.generate_suggestions_async(session_id, conn_role, target, agent_memories)
+    if suggestions:
+        await redis_service.save_suggestions_async(session_id, message_id, conn_role, suggestions)
+        await broadcast_service.publish(session_id, {"type": "suggestions", "suggestions": suggestions}, roles=[conn_role])
+
+
+async def _suggest_for_message(session_id: str, message_id: str, sender: str, target: str, memories_task):
+    try:
+        # Shielded so cancelling stale suggestions never cancels the shared memory lookup
+        agent_memories = await asyncio.shield(memories_task) if memories_task else []
+        await asyncio.gather(*[
+            _send_suggestions(session_id, message_id, conn_role, target, agent_memories)
+            for conn_role in await broadcast_service.session_roles(session_id) if conn_role != sender
+        ])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[ERROR] Suggestions failed: {e}")
+
+
+def _start_suggestions(session_id: str, message_id: str, sender: str, target: str, memories_task):
+    """
+    Generate suggestions in the background, cancelling any still running for an older message.
+    """
+    previous = _suggestion_tasks.get(session_id)
+    if previous is not None and not previous.done():
+        previous.cancel()
+    task = asyncio.create_task(_suggest_for_message(session_id, message_id, sender, target, memories_task))
+    _suggestion_tasks[session_id] = task
+    task.add_done_callback(lambda t: _suggestion_tasks.pop(session_id, None) if _suggestion_tasks.get(session_id) is t else None)
+
+
+async def _send_cached_suggestions(session_id: str, websocket: WebSocket, role: str):
+    suggestions = await redis_service.get_latest_suggestions_async(session_id, role)
+    if suggestions:
+        await websocket.send_json({"type": "suggestions", "suggestions": suggestions})
+
+
+async def _send_auto_reply(session_id: str, autoKey: str, agent_memories: list[str], source: str, target: str, use_cache: bool):
+    history_text = await chat_history.build_auto_history(session_id, autoKey)
+    auto_reply_msg = await translation_service.auto_reply_async(agent_memories, history_text)
+    auto_reply = json.loads(auto_reply_msg)
+    if auto_reply.get("end_chat", False):
+        return
+
+    reply_guest_lang = await translation_service.translate_async(auto_reply.get("reply", ""), target, source, use_cache)
+    host_reply = {
+        "from": "host",
+        "original": auto_reply.get("reply", ""),
+        "translated": reply_guest_lang.translated_text,
+        "autoModeEnabled": True,
+        "autoKey": autoKey
+    }
+    await broadcast_service.publish(session_id, host_reply)
+
 
 @router.websocket("/ws/{session_id}/{role}/{userId}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str, role: str, userId: str):
+async def websocket_endpoint(websocket: WebSocket, session_id: str, role: str, userId: str, stream: bool = False):
+    """
+    Clients that connect with ?stream=true also receive "partial" translation deltas.
+    """
     await websocket.accept()
+    await broadcast_service.register(session_id, websocket, role, streaming=stream)
+    try:
+        # Reconnecting clients get the suggestions for the latest message straight away
+        await _send_cached_suggestions(session_id, websocket, role)
 
-    if session_id not in connections:
-        connections[session_id] = []
-    connections[session_id].append((websocket, role))
+        # Notify host when guest joins
+        if role == "guest":
+            await broadcast_service.publish(session_id, {"type": "guest_joined"}, roles=["host"])
 
-    # Notify host when guest joins
-    if role == "guest":
-        for conn, conn_role in connections[session_id]:
-            if conn_role == "host":
-                await conn.send_json({"type": "guest_joined"})
-    
-    try:
         while True:
             text = await websocket.receive_text()
             data = json.loads(text)
@@ -29,9 +100,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, role: str, u
             if data.get("type") == "guest_joined":
                 print(f"Guest has joined session {session_id}")
                 # Optional: notify host that guest joined
-                for conn, conn_role in connections[session_id]:
-                    if conn_role == "host":
-                        await conn.send_json({"type": "guest_joined"})
+                await broadcast_service.publish(session_id, {"type": "guest_joined"}, roles=["host"])
                 continue  # skip the rest of the loop
 
             # Only process chat messages that have "message"
@@ -40,11 +109,10 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, role: str, u
                 continue
             chat_message = data["message"]
             mode_info = data["autoModeEnabled"]
-            auto_reply = None
             autoKey = data.get("autoKey")
 
             # Lookup session details from Redis
-            session = redis_service.get_session(session_id)
+            session = await redis_service.get_session_async(session_id)
             if not session:
                 await websocket.send_text("Invalid or expired session.")
                 break
@@ -57,9 +125,19 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, role: str, u
                 source = session["target_language"]
                 target = session["host_language"]
 
+            use_cache = str(session.get("translation_cache", "1")) != "0"
+
             # Translate & save
-            translated = translation_service.translate(chat_message, source, target)
-            redis_service.save_message(session_id, role, chat_message, translated.translated_text, mode_info, autoKey)
+            if data.get("stream"):
+                # Forward deltas as they arrive; the full message follows below
+                parts = []
+                async for delta in translation_service.translate_stream(chat_message, source, target, use_cache):
+                    parts.append(delta)
+                    await broadcast_service.publish(session_id, {"type": "partial", "from": role, "delta": delta, "autoKey": autoKey}, streaming_only=True)
+                translated = TranslationResponse(translated_text="".join(parts))
+            else:
+                translated = await translation_service.translate_async(chat_message, source, target, use_cache)
+            message_id = await redis_service.save_message_async(session_id, role, chat_message, translated.translated_text, mode_info, autoKey)
 
             message = {
                 "from": role,
@@ -69,56 +147,18 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, role: str, u
                 "autoKey": autoKey
             }
 
-            # Retrieve memories for guest if needed
-            agent_memories = []
+            # Memory retrieval only depends on the translation, so it runs while the message is broadcast
+            memories_task = None
             if role != "host":
-                userId = "123"
-                chat_message_host_lang = translated.translated_text
-                print(f"Getting embedding for : {chat_message_host_lang}")
-                query_embedding = get_embedding(chat_message_host_lang)
-                relevant_memories = redis_service.get_relevant_memories(userId, query_embedding, top_n=3)
-                print(f"user id:{userId}")
-                print(f"Relevant memories:{relevant_memories}")
-                for memory in relevant_memories:
-                    agent_memories.append(memory["message"])
-
-            # Auto-reply logic
+                memories_task = asyncio.create_task(_retrieve_memories("123", translated.translated_text))
+            _start_suggestions(session_id, message_id, role, target, memories_task)
+            await broadcast_service.publish(session_id, message)
+
             if role != "host" and mode_info:
-                autoModeMessages = redis_service.get_messages_by_autoKey(session_id, autoKey)
-                chat_history = []
-                for auto_mode_message in autoModeMessages:
-                    m_role = auto_mode_message["role"]
-                    original = auto_mode_message.get("original", "")
-                    translated_text = auto_mode_message.get("translated", "")
-                    line = f"{m_role}: {original if m_role=='host' else translated_text}"
-                    chat_history.append(line)
-                history_text = "\n".join(chat_history)
-                auto_reply_msg = translation_service.auto_reply(agent_memories, history_text)
-                auto_reply = json.loads(auto_reply_msg)
-
-                reply_guest_lang = translation_service.translate(auto_reply.get("reply", ""), target, source)
-                host_reply = {
-                    "from": "host",
-                    "original": auto_reply.get("reply", ""),
-                    "translated": reply_guest_lang.translated_text,
-                    "autoModeEnabled": True,
-                    "autoKey": autoKey
-                }
-
-            # Broadcast to all clients
-            for conn, conn_role in connections[session_id]:
-                await conn.send_json(message)
-                # Suggestions
-                if conn_role != role:
-                    suggestions = translation_service.generate_suggestions(session_id, conn_role, target, agent_memories)
-                    if suggestions:
-                        await conn.send_json({"type": "suggestions", "suggestions": suggestions})
-                # Auto-reply
-                if mode_info and auto_reply:
-                    if not auto_reply.get("end_chat", False):
-                        await conn.send_json(host_reply)
+                agent_memories = await memories_task if memories_task else []
+                await _send_auto_reply(session_id, autoKey, agent_memories, source, target, use_cache)
 
     except WebSocketDisconnect:
-        connections[session_id].remove((websocket, role))
-        if not connections[session_id]:
-            del connections[session_id]
+        pass
+    finally:
+        await broadcast_service.unregister(session_id, websocket, role)
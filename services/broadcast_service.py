@@ -0,0 +1,177 @@
+# services/broadcast_service.py
+"""
+Cross-process WebSocket fan-out over Redis Pub/Sub.
+
+Every node keeps a registry of its own sockets and subscribes to the channel of
+each session it has sockets for. Messages are published to Redis and each node
+delivers them only to its local sockets, so a host and guest connected to
+different workers still see each other.
+
+Events are handed to a per-session queue so a slow socket only delays its own
+session. Presence counts are kept per node and only count while that node's
+heartbeat key is alive, so a crashed worker's sockets drop out on their own.
+"""
+import asyncio
+import json
+import uuid
+from config import PRESENCE_TTL_SECONDS, SESSION_TTL_SECONDS
+from services import redis_service
+
+CHANNEL_PREFIX = "session_events:"
+NODE_KEY_PREFIX = "broadcast_node:"
+
+NODE_ID = uuid.uuid4().hex
+_client = redis_service.ar
+local_connections = {}  # session_id -> list of (websocket, role) on this node
+_streaming_sockets = set()  # local sockets that asked for partial (streaming) events
+_session_queues = {}  # session_id -> (event queue, delivery task) on this node
+_pubsub = None
+_listener = None
+_heartbeat = None
+
+
+def _channel(session_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{session_id}"
+
+
+def _presence_key(session_id: str) -> str:
+    return f"session:{session_id}:presence"
+
+
+def _presence_field(role: str) -> str:
+    return f"{NODE_ID}:{role}"
+
+
+def _node_key(node_id: str) -> str:
+    return f"{NODE_KEY_PREFIX}{node_id}"
+
+
+async def _deliver(session_id: str, payload: dict, roles=None, streaming_only=False):
+    await asyncio.gather(*[
+        conn.send_json(payload)
+        for conn, conn_role in list(local_connections.get(session_id, []))
+        if (roles is None or conn_role in roles) and (not streaming_only or conn in _streaming_sockets)
+    ], return_exceptions=True)
+
+
+async def _drain(session_id: str, queue: asyncio.Queue):
+    """
+    Deliver one session's events in order.
+    """
+    while True:
+        payload, roles, streaming_only = await queue.get()
+        await _deliver(session_id, payload, roles, streaming_only)
+
+
+def _enqueue(session_id: str, payload: dict, roles=None, streaming_only=False):
+    if session_id not in local_connections:
+        return  # no local sockets left (event raced the unsubscribe)
+    entry = _session_queues.get(session_id)
+    if entry is None or entry[1].done():
+        queue = asyncio.Queue()
+        entry = _session_queues[session_id] = (queue, asyncio.create_task(_drain(session_id, queue)))
+    entry[0].put_nowait((payload, roles, streaming_only))
+
+
+async def _beat():
+    while True:
+        try:
+            await _client.set(_node_key(NODE_ID), 1, ex=PRESENCE_TTL_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Presence heartbeat failed: {e}")
+        await asyncio.sleep(PRESENCE_TTL_SECONDS / 3)
+
+
+async def _listen():
+    while True:
+        try:
+            message = await _pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            event = json.loads(message["data"])
+            _enqueue(channel[len(CHANNEL_PREFIX):], event["payload"], event.get("roles"), event.get("streaming_only", False))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Broadcast listener failed: {e}")
+            await asyncio.sleep(0.5)
+
+
+async def register(session_id: str, websocket, role: str, streaming: bool = False):
+    """
+    Track a local socket and make sure this node receives its session's events.
+    Only streaming sockets receive events published with streaming_only=True.
+    """
+    global _pubsub, _listener, _heartbeat
+    first_local = session_id not in local_connections
+    local_connections.setdefault(session_id, []).append((websocket, role))
+    if streaming:
+        _streaming_sockets.add(websocket)
+
+    pipe = _client.pipeline()
+    pipe.set(_node_key(NODE_ID), 1, ex=PRESENCE_TTL_SECONDS)
+    pipe.hincrby(_presence_key(session_id), _presence_field(role), 1)
+    pipe.expire(_presence_key(session_id), SESSION_TTL_SECONDS)
+    await pipe.execute()
+    if _heartbeat is None or _heartbeat.done():
+        _heartbeat = asyncio.create_task(_beat())
+
+    if _pubsub is None:
+        _pubsub = _client.pubsub()
+    if first_local:
+        await _pubsub.subscribe(_channel(session_id))
+    if _listener is None or _listener.done():
+        _listener = asyncio.create_task(_listen())
+
+
+async def unregister(session_id: str, websocket, role: str):
+    sockets = local_connections.get(session_id, [])
+    if (websocket, role) in sockets:
+        sockets.remove((websocket, role))
+    _streaming_sockets.discard(websocket)
+    await _client.hincrby(_presence_key(session_id), _presence_field(role), -1)
+    if not sockets:
+        local_connections.pop(session_id, None)
+        entry = _session_queues.pop(session_id, None)
+        if entry is not None:
+            entry[1].cancel()
+        await _pubsub.unsubscribe(_channel(session_id))
+
+
+async def session_roles(session_id: str) -> set:
+    """
+    Roles with at least one connected socket on any live node. Counts left
+    behind by nodes whose heartbeat expired are removed.
+    """
+    counts = await _client.hgetall(_presence_key(session_id))
+    entries = []
+    for field, count in counts.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        node_id, _, role = field.partition(":")
+        entries.append((field, node_id, role, int(count)))
+    if not entries:
+        return set()
+
+    node_ids = sorted({node_id for _, node_id, _, _ in entries})
+    alive = dict(zip(node_ids, await _client.mget([_node_key(n) for n in node_ids])))
+    stale = [field for field, node_id, role, _ in entries if not role or alive[node_id] is None]
+    if stale:
+        await _client.hdel(_presence_key(session_id), *stale)
+    return {
+        role
+        for field, node_id, role, count in entries
+        if role and alive[node_id] is not None and count > 0
+    }
+
+
+async def publish(session_id: str, payload: dict, roles=None, streaming_only=False):
+    """
+    Send payload to every socket in the session on every node (optionally only
+    the given roles, or only sockets registered as streaming).
+    """
+    event = {"payload": payload, "roles": list(roles) if roles is not None else None, "streaming_only": streaming_only}
+    await _client.publish(_channel(session_id), json.dumps(event))
@@ -0,0 +1,60 @@
+# services/chat_history.py
+"""
+Bounded chat history for auto-reply prompts.
+
+The last AUTO_HISTORY_WINDOW turns are sent verbatim; older turns are folded
+into a rolling summary stored next to the auto-mode list, updated
+AUTO_HISTORY_SUMMARY_CHUNK turns at a time so only a fraction of messages
+trigger a summary call.
+"""
+import json
+from config import AUTO_HISTORY_SUMMARY_CHUNK, AUTO_HISTORY_WINDOW, SESSION_TTL_SECONDS
+from services import redis_service, translation_service
+
+
+def format_turn(message: dict) -> str:
+    m_role = message["role"]
+    original = message.get("original", "")
+    translated_text = message.get("translated", "")
+    return f"{m_role}: {original if m_role=='host' else translated_text}"
+
+
+async def build_auto_history(session_id: str, autoKey: str) -> str:
+    """
+    History text for auto_reply: rolling summary of older turns plus the recent window.
+    """
+    key = f"session:{session_id}:auto:{autoKey}"
+    summary_key = f"{key}:summary"
+    await redis_service.flush_pending_messages()
+
+    pipe = redis_service.ar.pipeline(transaction=False)
+    pipe.llen(key)
+    pipe.hgetall(summary_key)
+    # save_message refreshes the list's TTL on every turn; keep the summary alive just as long
+    pipe.expire(summary_key, SESSION_TTL_SECONDS)
+    total, state, _ = await pipe.execute()
+    state = {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in state.items()
+    }
+    summary = state.get("summary", "")
+    summarized = int(state.get("summarized", 0))
+
+    # Turns before this index fall outside the verbatim window
+    window_start = max(total - AUTO_HISTORY_WINDOW, 0)
+    if window_start - summarized >= AUTO_HISTORY_SUMMARY_CHUNK:
+        raw_turns = await redis_service.ar.lrange(key, summarized, window_start - 1)
+        new_turns = "\n".join(format_turn(json.loads(m)) for m in raw_turns)
+        summary = await translation_service.summarize_history_async(summary, new_turns)
+        summarized = window_start
+        pipe = redis_service.ar.pipeline()
+        pipe.hset(summary_key, mapping={"summary": summary, "summarized": summarized})
+        pipe.expire(summary_key, SESSION_TTL_SECONDS)
+        await pipe.execute()
+
+    # Everything not yet folded into the summary is sent verbatim
+    recent = await redis_service.ar.lrange(key, summarized, -1)
+    lines = [format_turn(json.loads(m)) for m in recent]
+    if summary:
+        lines.insert(0, f"Summary of earlier conversation: {summary}")
+    return "\n".join(lines)
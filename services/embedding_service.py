@@ -1,26 +1,330 @@
-from cerebras.cloud.sdk import Cerebras
+import asyncio
+import hashlib
+import multiprocessing
 import os
-from config import CEREBRAS_API_KEY
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING
+import numpy as np
+from config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_WAIT_MS,
+    EMBEDDING_CACHE_REDIS,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_QUANTIZE,
+    EMBEDDING_WORKERS,
+)
 from threading import Lock
 
+if TYPE_CHECKING:
+    # Imported lazily at runtime: pulling in torch dominates worker boot time
+    from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# int8 export shipped in the model repo; AVX2 runs on any modern x86 CPU
+QUANTIZED_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+EMBEDDING_CACHE_KEY_PREFIX = "embedding_cache:"
+
 # Global variables
 _model = None
 _model_lock = Lock()  # Ensure thread-safe initialization
+_warm = False  # True once the model has been loaded and run once
+_warm_up_error = None  # set when startup warm-up failed; the model then loads on first use
+
+# Embedding worker processes (EMBEDDING_WORKERS > 0)
+_pool = None
+_pool_lock = Lock()
 
-def _get_model() -> SentenceTransformer:
+# Embedding cache: cache key -> embedding (list of floats)
+_cache = OrderedDict()
+_cache_lock = Lock()
+_cache_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+# Micro-batching state, bound to the event loop that first used it
+_batch_queue = None
+_batch_worker = None
+_batch_loop = None
+
+def _get_model() -> "SentenceTransformer":
     global _model
     if _model is None:
         with _model_lock:  # Prevent race conditions if multiple requests come at once
             if _model is None:
-                _model = SentenceTransformer("all-MiniLM-L6-v2")
+                from sentence_transformers import SentenceTransformer
+                if EMBEDDING_BACKEND == "onnx":
+                    _model = SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs={"file_name": _onnx_file()})
+                else:
+                    _model = SentenceTransformer(MODEL_NAME)
     return _model
 
+def _onnx_file() -> str:
+    if EMBEDDING_ONNX_FILE:
+        return EMBEDDING_ONNX_FILE
+    return QUANTIZED_ONNX_FILE if EMBEDDING_QUANTIZE else "onnx/model.onnx"
+
+def _model_tag() -> str:
+    """
+    Identifies the weights producing embeddings, so caches never mix backends.
+    """
+    if EMBEDDING_BACKEND == "onnx":
+        return f"{MODEL_NAME}:onnx:{_onnx_file()}"
+    return MODEL_NAME
+
+def _init_worker():
+    # Split the cores between workers instead of every process using all of them
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // EMBEDDING_WORKERS))
+    _get_model().encode(["warm up"], convert_to_numpy=True)
+
+def _encode_in_worker(texts: list[str]):
+    """
+    Runs in a worker process: encode and hand the float32 matrix back through
+    shared memory rather than pickling it. The caller unlinks the segment.
+    """
+    embeddings = _get_model().encode(texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True).astype(np.float32)
+    segment = shared_memory.SharedMemory(create=True, size=max(embeddings.nbytes, 1))
+    np.ndarray(embeddings.shape, dtype=np.float32, buffer=segment.buf)[:] = embeddings
+    segment.close()
+    return segment.name, embeddings.shape
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a process that may already hold torch state is unsafe
+                _pool = ProcessPoolExecutor(
+                    max_workers=EMBEDDING_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+    return _pool
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    """
+    Drop a pool whose worker died so the next call starts a new one. The node
+    reports not ready until an encode on the new pool succeeds.
+    """
+    global _pool, _warm
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+            _warm = False
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def _submit_encode(texts: list[str]):
+    pool = _get_pool()
+    try:
+        return pool.submit(_encode_in_worker, texts).result()
+    except BrokenProcessPool:
+        # A worker was killed (e.g. OOM); retry once on a fresh pool
+        print("[WARN] Embedding worker pool broken, restarting it")
+        _reset_pool(pool)
+        return _get_pool().submit(_encode_in_worker, texts).result()
+
+def _encode(texts: list[str]) -> np.ndarray:
+    global _warm
+    if EMBEDDING_WORKERS <= 0:
+        embeddings = _get_model().encode(texts, batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True)
+    else:
+        name, shape = _submit_encode(texts)
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            embeddings = np.ndarray(shape, dtype=np.float32, buffer=segment.buf).copy()
+        finally:
+            segment.close()
+            segment.unlink()
+    # A lazy load after a failed warm-up also makes the node ready
+    _warm = True
+    return embeddings
+
+def _warm_up_workers():
+    pool = _get_pool()
+    for future in [pool.submit(_encode_in_worker, ["warm up"]) for _ in range(EMBEDDING_WORKERS)]:
+        name, _ = future.result()
+        segment = shared_memory.SharedMemory(name=name)
+        segment.close()
+        segment.unlink()
+
+def warm_up():
+    """
+    Load the model and run one encode so the first real request pays no startup cost.
+    With worker processes, start every worker (each loads its model on start).
+    A failure is recorded for the readiness probe and re-raised.
+    """
+    global _warm, _warm_up_error
+    try:
+        if EMBEDDING_WORKERS > 0:
+            _warm_up_workers()
+        else:
+            _get_model().encode(["warm up"], convert_to_numpy=True)
+    except Exception as e:
+        _warm_up_error = f"{type(e).__name__}: {e}"
+        raise
+    _warm_up_error = None
+    _warm = True
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def is_warm() -> bool:
+    return _warm
+
+def get_warm_up_error():
+    return _warm_up_error
+
+def _cache_key(text: str) -> str:
+    # MiniLM is uncased, so case and whitespace do not change the embedding
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(f"{_model_tag()}\0{normalized}".encode("utf-8")).hexdigest()
+
+def _cache_get_local(key: str):
+    with _cache_lock:
+        embedding = _cache.get(key)
+        if embedding is not None:
+            _cache.move_to_end(key)
+            _cache_stats["local_hits"] += 1
+        return embedding
+
+def _cache_put_local(key: str, embedding: list[float]):
+    with _cache_lock:
+        _cache[key] = embedding
+        _cache.move_to_end(key)
+        while len(_cache) > EMBEDDING_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def _lookup_cached(texts: list[str]) -> dict:
+    """
+    Return {index: embedding} for texts found in the local or Redis cache.
+    """
+    found = {}
+    remote = []
+    for idx, text in enumerate(texts):
+        key = _cache_key(text)
+        embedding = _cache_get_local(key)
+        if embedding is not None:
+            found[idx] = embedding
+        else:
+            remote.append((idx, key))
+
+    if remote and EMBEDDING_CACHE_REDIS:
+        from services import redis_service  # imported lazily: redis_service imports this module
+        try:
+            blobs = redis_service.r_raw.mget([f"{EMBEDDING_CACHE_KEY_PREFIX}{key}" for _, key in remote])
+        except Exception as e:
+            print(f"[WARN] Embedding cache lookup failed: {e}")
+            blobs = [None] * len(remote)
+        for (idx, key), blob in zip(remote, blobs):
+            if blob is not None:
+                embedding = np.frombuffer(blob, dtype=np.float32).tolist()
+                _cache_put_local(key, embedding)
+                found[idx] = embedding
+                with _cache_lock:
+                    _cache_stats["redis_hits"] += 1
+    return found
+
+def _store_cached(texts: list[str], embeddings: list[list[float]]):
+    pipe = None
+    if EMBEDDING_CACHE_REDIS:
+        from services import redis_service
+        pipe = redis_service.r_raw.pipeline(transaction=False)
+    for text, embedding in zip(texts, embeddings):
+        key = _cache_key(text)
+        _cache_put_local(key, embedding)
+        if pipe is not None:
+            pipe.setex(f"{EMBEDDING_CACHE_KEY_PREFIX}{key}", EMBEDDING_CACHE_TTL_SECONDS, np.asarray(embedding, dtype=np.float32).tobytes())
+    if pipe is not None:
+        try:
+            pipe.execute()
+        except Exception as e:
+            print(f"[WARN] Embedding cache write failed: {e}")
+
 def get_embedding(text: str) -> list[float]:
     """
     Generate a vector embedding for the given text.
     Lazy-loads the model on first call.
     """
-    model = _get_model()
-    embedding = model.encode(text, convert_to_numpy=True)
-    return embedding.tolist()
+    return get_embeddings([text])[0]
+
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """
+    Generate embeddings for several texts in a single model call.
+    Cached texts skip the model.
+    """
+    if not texts:
+        return []
+    results = _lookup_cached(texts)
+    missing = [idx for idx in range(len(texts)) if idx not in results]
+    if missing:
+        with _cache_lock:
+            _cache_stats["misses"] += len(missing)
+        missing_texts = [texts[idx] for idx in missing]
+        embeddings = _encode(missing_texts).tolist()
+        _store_cached(missing_texts, embeddings)
+        for idx, embedding in zip(missing, embeddings):
+            results[idx] = embedding
+    return [results[idx] for idx in range(len(texts))]
+
+def get_embedding_cache_stats() -> dict:
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        stats["size"] = len(_cache)
+    lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["local_hits"] + stats["redis_hits"]) / lookups if lookups else 0.0
+    return stats
+
+async def _run_batches():
+    """
+    Collect queued texts until EMBEDDING_BATCH_SIZE items or EMBEDDING_BATCH_WAIT_MS
+    have passed, then encode them together off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _batch_queue.get()]
+        deadline = loop.time() + EMBEDDING_BATCH_WAIT_MS / 1000
+        while len(batch) < EMBEDDING_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_batch_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = await loop.run_in_executor(None, get_embeddings, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+async def get_embedding_async(text: str) -> list[float]:
+    """
+    Non-blocking get_embedding(); concurrent callers are encoded as one batch.
+    """
+    global _batch_queue, _batch_worker, _batch_loop
+    # Local cache hits never touch the queue; Redis lookups happen in the batch worker thread
+    cached = _cache_get_local(_cache_key(text))
+    if cached is not None:
+        return cached
+    loop = asyncio.get_running_loop()
+    if _batch_loop is not loop or _batch_worker is None or _batch_worker.done():
+        _batch_queue = asyncio.Queue()
+        _batch_worker = loop.create_task(_run_batches())
+        _batch_loop = loop
+    future = loop.create_future()
+    await _batch_queue.put((text, future))
+    return await future
@@ -0,0 +1,275 @@
+# services/memory_jobs.py
+"""
+Redis-backed queue for memory ingestion, plus bulk import.
+
+/memory/save enqueues the raw message and returns a job id; workers pop jobs in
+batches, summarize them with one LLM call, embed them with one model call and
+save them, updating each job's status hash as they go. Bulk imports go through
+the same batch path directly.
+
+Claimed jobs are moved to a processing list rather than popped, and removed
+from it once they are done or failed; jobs a crashed worker left there are
+put back on the queue after MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS.
+"""
+import asyncio
+import datetime
+import json
+import time
+import uuid
+from config import (
+    MEMORY_IMPORT_BATCH_SIZE,
+    MEMORY_JOB_BATCH_SIZE,
+    MEMORY_JOB_TTL_SECONDS,
+    MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS,
+    MEMORY_SUMMARY_CONCURRENCY,
+)
+from services import redis_service, translation_service
+from services.embedding_service import get_embeddings
+
+MEMORY_JOB_QUEUE = "memory_jobs:queue"
+MEMORY_JOB_PROCESSING = "memory_jobs:processing"
+MEMORY_JOB_CLAIMS = "memory_jobs:claimed_at"  # hash: job id -> claim time, for entries in the processing list
+MEMORY_JOB_KEY_PREFIX = "memory_job:"
+
+_last_requeue_check = 0.0
+
+# Bounds concurrent summary LLM calls across workers and imports in this process
+_summary_semaphore = asyncio.Semaphore(MEMORY_SUMMARY_CONCURRENCY)
+
+
+def _job_key(job_id: str) -> str:
+    return f"{MEMORY_JOB_KEY_PREFIX}{job_id}"
+
+
+def enqueue_memory_job(user_id: str, message: str) -> str:
+    job_id = str(uuid.uuid4())
+    pipe = redis_service.r.pipeline()
+    pipe.hset(_job_key(job_id), mapping={
+        "id": job_id,
+        "user_id": user_id,
+        "message": message,
+        "status": "queued",
+        "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+    })
+    pipe.expire(_job_key(job_id), MEMORY_JOB_TTL_SECONDS)
+    pipe.rpush(MEMORY_JOB_QUEUE, job_id)
+    pipe.execute()
+    return job_id
+
+
+def get_memory_job(job_id: str):
+    job = redis_service.r.hgetall(_job_key(job_id))
+    if not job:
+        return None
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in job.items()
+    }
+
+
+async def _set_status(job_ids, status: str, **fields):
+    pipe = redis_service.ar.pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.hset(_job_key(job_id), mapping={"status": status, **fields})
+    await pipe.execute()
+
+
+async def _next_batch() -> list[str]:
+    """
+    Block for the first job, then take whatever else is queued up to the batch size.
+    Claimed jobs move to the processing list and their claim time is recorded.
+    """
+    first = await redis_service.ar.blmove(MEMORY_JOB_QUEUE, MEMORY_JOB_PROCESSING, 5, "LEFT", "RIGHT")
+    if first is None:
+        return []
+    job_ids = [first]
+    if MEMORY_JOB_BATCH_SIZE > 1:
+        pipe = redis_service.ar.pipeline(transaction=False)
+        for _ in range(MEMORY_JOB_BATCH_SIZE - 1):
+            pipe.lmove(MEMORY_JOB_QUEUE, MEMORY_JOB_PROCESSING, "LEFT", "RIGHT")
+        job_ids.extend(j for j in await pipe.execute() if j is not None)
+    job_ids = [j.decode() if isinstance(j, bytes) else j for j in job_ids]
+    now = time.time()
+    await redis_service.ar.hset(MEMORY_JOB_CLAIMS, mapping={job_id: now for job_id in job_ids})
+    return job_ids
+
+
+async def _ack(job_ids):
+    pipe = redis_service.ar.pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.lrem(MEMORY_JOB_PROCESSING, 1, job_id)
+    pipe.hdel(MEMORY_JOB_CLAIMS, *job_ids)
+    await pipe.execute()
+
+
+async def _requeue(job_ids):
+    """
+    Move claimed jobs back to the front of the queue. LREM decides the owner,
+    so a job is requeued once even if several workers race for it.
+    """
+    for job_id in reversed(job_ids):  # LPUSH one at a time, so reverse to keep their order
+        if await redis_service.ar.lrem(MEMORY_JOB_PROCESSING, 1, job_id):
+            pipe = redis_service.ar.pipeline()
+            pipe.hdel(MEMORY_JOB_CLAIMS, job_id)
+            pipe.lpush(MEMORY_JOB_QUEUE, job_id)
+            await pipe.execute()
+
+
+async def requeue_stale_jobs() -> int:
+    """
+    Put back jobs claimed more than MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS ago.
+    """
+    job_ids = [
+        j.decode() if isinstance(j, bytes) else j
+        for j in await redis_service.ar.lrange(MEMORY_JOB_PROCESSING, 0, -1)
+    ]
+    if not job_ids:
+        return 0
+    claimed = await redis_service.ar.hmget(MEMORY_JOB_CLAIMS, job_ids)
+    now = time.time()
+    # No claim time yet: just claimed, or the worker died before recording it.
+    # Start its clock now so it is requeued a full timeout later if nobody acks it
+    unstamped = [job_id for job_id, claimed_at in zip(job_ids, claimed) if claimed_at is None]
+    if unstamped:
+        pipe = redis_service.ar.pipeline(transaction=False)
+        for job_id in unstamped:
+            pipe.hsetnx(MEMORY_JOB_CLAIMS, job_id, now)
+        await pipe.execute()
+    cutoff = now - MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS
+    stale = [job_id for job_id, claimed_at in zip(job_ids, claimed) if claimed_at is not None and float(claimed_at) < cutoff]
+    await _requeue(stale)
+    return len(stale)
+
+
+async def _summarize(messages: list[str]) -> list[str]:
+    """
+    Summarize messages in LLM batches of MEMORY_JOB_BATCH_SIZE, a few batches at a time.
+    """
+    async def summarize_chunk(chunk):
+        async with _summary_semaphore:
+            return await translation_service.get_contextual_memories_async(chunk)
+
+    chunks = [messages[i:i + MEMORY_JOB_BATCH_SIZE] for i in range(0, len(messages), MEMORY_JOB_BATCH_SIZE)]
+    results = await asyncio.gather(*[summarize_chunk(chunk) for chunk in chunks])
+    return [summary for result in results for summary in result]
+
+
+async def process_memory_batch(items: list[tuple[str, str]], memory_ids: list[str] | None = None) -> list[dict]:
+    """
+    Summarize, embed and save (user_id, message) pairs as memories in batches.
+    memory_ids fixes each memory's id, so reprocessing the same items replaces
+    the memories instead of adding copies. Returns the saved memory objects in input order.
+    """
+    summaries = await _summarize([message for _, message in items])
+    embeddings = await asyncio.to_thread(get_embeddings, summaries)
+
+    memories = []
+    by_user = {}
+    for (user_id, _), summary, embedding, memory_id in zip(items, summaries, embeddings, memory_ids or [None] * len(items)):
+        memory = redis_service.prepare_memory(summary, user_id, embedding, memory_id)
+        memories.append(memory)
+        by_user.setdefault(user_id, []).append(memory)
+    for user_id, user_memories in by_user.items():
+        await asyncio.to_thread(redis_service.save_memories, user_id, user_memories)
+    return memories
+
+
+def _parse_import_line(line: bytes):
+    """
+    An import line is a JSON object with a "message" field or a bare JSON string.
+    """
+    record = json.loads(line)
+    if isinstance(record, dict):
+        record = record.get("message")
+    if not isinstance(record, str) or not record.strip():
+        raise ValueError("missing message")
+    return record
+
+
+async def import_memories(user_id: str, chunks) -> dict:
+    """
+    Import memories from an async iterator of NDJSON bytes, processing
+    MEMORY_IMPORT_BATCH_SIZE messages per round.
+    """
+    imported = 0
+    skipped = 0
+    pending = []
+    buffer = b""
+
+    async def flush():
+        nonlocal imported, pending
+        if pending:
+            await process_memory_batch([(user_id, message) for message in pending])
+            imported += len(pending)
+            pending = []
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                pending.append(_parse_import_line(line))
+            except ValueError:
+                skipped += 1
+            if len(pending) >= MEMORY_IMPORT_BATCH_SIZE:
+                await flush()
+    if buffer.strip():
+        try:
+            pending.append(_parse_import_line(buffer))
+        except ValueError:
+            skipped += 1
+    await flush()
+    return {"imported": imported, "skipped": skipped}
+
+
+async def run_memory_worker():
+    global _last_requeue_check
+    while True:
+        job_ids = []
+        try:
+            if time.monotonic() - _last_requeue_check > MEMORY_JOB_VISIBILITY_TIMEOUT_SECONDS / 4:
+                _last_requeue_check = time.monotonic()
+                requeued = await requeue_stale_jobs()
+                if requeued:
+                    print(f"[WARN] Requeued {requeued} stale memory jobs")
+
+            job_ids = await _next_batch()
+            if not job_ids:
+                continue
+            jobs = await asyncio.gather(*[asyncio.to_thread(get_memory_job, j) for j in job_ids])
+            # Expired jobs and jobs finished before a crash (requeued ahead of their ack) are dropped
+            finished = [j for j, job in zip(job_ids, jobs) if not job or job.get("memory_id")]
+            jobs = [job for job in jobs if job and not job.get("memory_id")]
+            if finished:
+                await _ack(finished)
+            if not jobs:
+                continue
+            await _set_status([job["id"] for job in jobs], "processing")
+            try:
+                # The job id is the memory id: a job requeued after a crash between the
+                # save and the "done" update overwrites its memory rather than saving it twice
+                memories = await process_memory_batch(
+                    [(job["user_id"], job["message"]) for job in jobs],
+                    [job["id"] for job in jobs],
+                )
+            except Exception as e:
+                print(f"[ERROR] Memory job batch failed: {e}")
+                await _set_status([job["id"] for job in jobs], "failed", error=str(e))
+                await _ack([job["id"] for job in jobs])
+                continue
+            pipe = redis_service.ar.pipeline(transaction=False)
+            for job, memory in zip(jobs, memories):
+                pipe.hset(_job_key(job["id"]), mapping={"status": "done", "memory_id": memory["id"], "memory": memory["message"]})
+                pipe.lrem(MEMORY_JOB_PROCESSING, 1, job["id"])
+                pipe.hdel(MEMORY_JOB_CLAIMS, job["id"])
+            await pipe.execute()
+        except asyncio.CancelledError:
+            # Shutting down mid-batch: hand the claimed jobs straight back
+            if job_ids:
+                await asyncio.shield(_requeue(job_ids))
+            raise
+        except Exception as e:
+            print(f"[ERROR] Memory worker failed: {e}")
+            await asyncio.sleep(1)
@@ -0,0 +1,27 @@
+# services/memory_migrations.py
+"""
+One-off data migrations for stored user memories.
+
+Run from the project root:
+    python -m services.memory_migrations
+"""
+from services import redis_service
+
+
+def migrate_all_memory_layouts() -> int:
+    """
+    Move every legacy user_memories:* list to one hash per memory.
+    Users not migrated here are migrated on their first read.
+    """
+    total = 0
+    for key in redis_service.r.scan_iter(match=f"{redis_service.LEGACY_MEMORY_KEY_PREFIX}*"):
+        key = key.decode() if isinstance(key, bytes) else key
+        user_id = key[len(redis_service.LEGACY_MEMORY_KEY_PREFIX):]
+        migrated = redis_service.migrate_memory_layout(user_id)
+        print(f"Migrated {migrated} memories for user {user_id}")
+        total += migrated
+    return total
+
+
+if __name__ == "__main__":
+    print(f"Migrated {migrate_all_memory_layouts()} memories to the hash-per-memory layout")
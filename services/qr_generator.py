@@ -1,13 +1,20 @@
 # services/qr_generator.py
 import qrcode
+import qrcode.image.svg
 from PIL import Image
 import base64
+import threading
+import uuid
+from collections import deque
 from io import BytesIO
+from config import QR_POOL_SIZE
 
-def generate_qr_base64(url: str) -> str:
-    """
-    Generates a QR code for the given URL and returns it as a base64 PNG string.
-    """
+# Pre-generated (session_id, png qr_base64) pairs for the default session URL
+_pool = deque()
+_pool_lock = threading.Lock()
+_refilling = False
+
+def _make_qr(url: str) -> qrcode.QRCode:
     # Create QR code
     qr = qrcode.QRCode(
         version=1,
@@ -16,6 +23,18 @@ def generate_qr_base64(url: str) -> str:
     )
     qr.add_data(url)
     qr.make(fit=True)
+    return qr
+
+def generate_qr_base64(url: str, fmt: str = "png") -> str:
+    """
+    Generates a QR code for the given URL and returns it as a base64 string.
+    fmt="png" rasterizes through PIL; fmt="svg" emits vector paths and skips rasterization.
+    """
+    qr = _make_qr(url)
+
+    if fmt == "svg":
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        return base64.b64encode(img.to_string()).decode("utf-8")
 
     # Convert to PIL image
     img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
@@ -27,3 +46,47 @@ def generate_qr_base64(url: str) -> str:
     # Encode to base64
     qr_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
     return qr_base64
+
+def refill_pool(base_url: str):
+    """
+    Top the pool of pre-generated session ids and PNG QR codes up to QR_POOL_SIZE.
+    Runs on the thread started by schedule_refill().
+    """
+    global _refilling
+    try:
+        while True:
+            with _pool_lock:
+                if len(_pool) >= QR_POOL_SIZE:
+                    return
+            session_id = str(uuid.uuid4())
+            qr_base64 = generate_qr_base64(f"{base_url}/{session_id}")
+            with _pool_lock:
+                _pool.append((session_id, qr_base64))
+    finally:
+        with _pool_lock:
+            _refilling = False
+
+def schedule_refill(base_url: str):
+    """
+    Refill the pool on a background thread unless a refill is already running.
+    """
+    global _refilling
+    if QR_POOL_SIZE <= 0:
+        return
+    with _pool_lock:
+        if _refilling or len(_pool) >= QR_POOL_SIZE:
+            return
+        _refilling = True
+    threading.Thread(target=refill_pool, args=(base_url,), daemon=True).start()
+
+def take_pregenerated(base_url: str):
+    """
+    Pop a (session_id, png qr_base64) pair, or None if the pool is empty.
+    Schedules a background refill when the pool runs low.
+    """
+    if QR_POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        entry = _pool.popleft() if _pool else None
+    schedule_refill(base_url)
+    return entry
@@ -1,7 +1,16 @@
+import asyncio
+from collections import OrderedDict
+from threading import Lock
 from typing import Dict, List
+import re
 import uuid
+import numpy as np
 import redis
-from config import REDIS_HOST, REDIS_PORT, SESSION_TTL_SECONDS,SESSION_TTL_SECONDS
+import redis.asyncio as aioredis
+from redis.commands.search.field import TagField, TextField, VectorField
+from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+from config import EMBEDDING_DIM, MEMORY_INDEX_CACHE_SIZE, MEMORY_SEARCH_BACKEND, MEMORY_VECTOR_ALGORITHM, MESSAGE_WRITE_BEHIND_MS, REDIS_HOST, REDIS_MAX_CONNECTIONS, REDIS_PORT, SESSION_TTL_SECONDS,SESSION_TTL_SECONDS
 import json
 import datetime
 from services import embedding_service
@@ -9,7 +18,38 @@ from services import embedding_service
 # r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
 r = redis.from_url(REDIS_HOST)
 
-MEMORY_KEY_PREFIX = "user_memories:"
+# Binary-safe client for raw float32 payloads; REDIS_HOST may carry decode_responses=True
+_raw_pool = redis.ConnectionPool.from_url(REDIS_HOST)
+_raw_pool.connection_kwargs["decode_responses"] = False
+r_raw = redis.Redis(connection_pool=_raw_pool)
+
+# Async client for the event loop; callers wait for a free connection instead of failing
+ar = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool.from_url(REDIS_HOST, max_connections=REDIS_MAX_CONNECTIONS))
+
+MEMORY_KEY_PREFIX = "user_memory:"  # hash per memory: user_memory:{user_id}:{memory_id}
+MEMORY_INDEX_KEY_PREFIX = "user_memory_ids:"  # sorted set of memory ids, scored by creation time
+MEMORY_VERSION_KEY_PREFIX = "user_memories_version:"  # bumped on every write, shared by all workers
+
+MEMORY_FIELDS = ("id", "user_id", "message", "summary", "timestamp", "embedding")
+
+# Pre-hash layout: JSON list plus a float32 embedding hash, migrated on first read
+LEGACY_MEMORY_KEY_PREFIX = "user_memories:"
+LEGACY_MEMORY_EMBEDDING_KEY_PREFIX = "user_memory_embeddings:"
+
+MEMORY_VECTOR_INDEX = "idx:user_memory"
+
+# Write-behind buffer for chat messages: list key -> serialized entries awaiting flush
+_pending_messages = {}
+_flush_task = None
+_flush_lock = asyncio.Lock()  # one flush at a time, so a reader waits for a batch already being written
+
+# None until checked; False when the RediSearch module is not loaded
+_vector_index_available = None
+
+# user_id -> (version, memories, normalized embedding matrix)
+_memory_index_cache = OrderedDict()
+_memory_index_lock = Lock()
+_memory_index_stats = {"hits": 0, "misses": 0}
 
 
 def get_recent_messages(session_id: str, n: int = 5):
@@ -18,15 +58,24 @@ def get_recent_messages(session_id: str, n: int = 5):
     return [json.loads(i) for i in items]
 
 
-def prepare_memory(message: str, user_id: str) -> dict:
+async def get_recent_messages_async(session_id: str, n: int = 5):
+    await flush_pending_messages()
+    key = f"session:{session_id}:messages"
+    items = await ar.lrange(key, -n, -1)
+    return [json.loads(i) for i in items]
+
+
+def prepare_memory(message: str, user_id: str, embedding: List[float] | None = None, memory_id: str | None = None) -> dict:
     """
     Prepares a memory object to store in Redis.
-    Generates embedding, optional summary, and a unique ID.
+    Generates embedding (unless one is passed in), optional summary, and a unique ID
+    (unless one is passed in, so a retried save overwrites instead of duplicating).
     """
-    embedding = embedding_service.get_embedding(message)
+    if embedding is None:
+        embedding = embedding_service.get_embedding(message)
     summary = message
     timestamp = datetime.datetime.utcnow().isoformat() + "Z"
-    memory_id = str(uuid.uuid4())  # unique memory ID
+    memory_id = memory_id or str(uuid.uuid4())  # unique memory ID
 
     memory = {
         "id": memory_id,
@@ -40,35 +89,133 @@ def prepare_memory(message: str, user_id: str) -> dict:
     return memory
 
 
-def save_session(session_id: str, metadata: dict):
+def save_session(session_id: str, metadata: dict) -> int:
+    """
+    Store session metadata with TTL in one round-trip. Returns the key's TTL.
+    """
     key = f"session:{session_id}"
-    r.hset(key, mapping=metadata)
-    r.expire(key, SESSION_TTL_SECONDS)
+    pipe = r.pipeline()
+    pipe.hset(key, mapping=metadata)
+    pipe.expire(key, SESSION_TTL_SECONDS)
+    pipe.ttl(key)
+    return pipe.execute()[-1]
 
 def get_session(session_id: str):
     key = f"session:{session_id}"
     return r.hgetall(key)
 
-def save_message(session_id: str, role: str, original: str, translated: str, autoMode: bool, autoKey: str):
-    # Always save in main session history
-    key = f"session:{session_id}:messages"
+async def get_session_async(session_id: str):
+    key = f"session:{session_id}"
+    return await ar.hgetall(key)
+
+def _message_entry(role: str, original: str, translated: str, autoMode: bool, autoKey: str) -> dict:
     entry = {
+        "id": uuid.uuid4().hex,
         "role": role,
         "original": original,
         "translated": translated,
     }
     if autoMode:
         entry["autoKey"] = autoKey
+    return entry
 
-    # Push to main session list
-    r.rpush(key, json.dumps(entry))
-    r.expire(key, SESSION_TTL_SECONDS)
-
-    # If autoMode, also save to a dedicated autokey list
+def _message_keys(session_id: str, autoMode: bool, autoKey: str) -> List[str]:
+    # Always save in main session history; if autoMode, also in a dedicated autokey list
+    keys = [f"session:{session_id}:messages"]
     if autoMode:
-        auto_key = f"session:{session_id}:auto:{autoKey}"
-        r.rpush(auto_key, json.dumps(entry))
-        r.expire(auto_key, SESSION_TTL_SECONDS)
+        keys.append(f"session:{session_id}:auto:{autoKey}")
+    return keys
+
+def save_message(session_id: str, role: str, original: str, translated: str, autoMode: bool, autoKey: str) -> str:
+    """
+    Append a chat message and return its id.
+    """
+    message = _message_entry(role, original, translated, autoMode, autoKey)
+    entry = json.dumps(message)
+    pipe = r.pipeline()
+    for key in _message_keys(session_id, autoMode, autoKey):
+        pipe.rpush(key, entry)
+        pipe.expire(key, SESSION_TTL_SECONDS)
+    pipe.execute()
+    return message["id"]
+
+
+async def save_message_async(session_id: str, role: str, original: str, translated: str, autoMode: bool, autoKey: str) -> str:
+    """
+    Append a chat message in one round-trip, or buffer it for the next
+    write-behind flush when MESSAGE_WRITE_BEHIND_MS is set. Returns the
+    message id either way.
+    """
+    global _flush_task
+    message = _message_entry(role, original, translated, autoMode, autoKey)
+    entry = json.dumps(message)
+    keys = _message_keys(session_id, autoMode, autoKey)
+
+    if MESSAGE_WRITE_BEHIND_MS > 0:
+        for key in keys:
+            _pending_messages.setdefault(key, []).append(entry)
+        if _flush_task is None or _flush_task.done():
+            _flush_task = asyncio.create_task(_flush_periodically())
+        return message["id"]
+
+    pipe = ar.pipeline()
+    for key in keys:
+        pipe.rpush(key, entry)
+        pipe.expire(key, SESSION_TTL_SECONDS)
+    await pipe.execute()
+    return message["id"]
+
+
+def _suggestions_key(session_id: str, message_id: str, role: str) -> str:
+    return f"session:{session_id}:suggestions:{message_id}:{role}"
+
+
+async def save_suggestions_async(session_id: str, message_id: str, role: str, suggestions: List[str]):
+    await ar.setex(_suggestions_key(session_id, message_id, role), SESSION_TTL_SECONDS, json.dumps(suggestions))
+
+
+async def get_latest_suggestions_async(session_id: str, role: str):
+    """
+    Cached suggestions for role generated from the session's latest message, or None.
+    """
+    last = await get_recent_messages_async(session_id, n=1)
+    if not last or "id" not in last[0]:
+        return None
+    cached = await ar.get(_suggestions_key(session_id, last[0]["id"], role))
+    return json.loads(cached) if cached else None
+
+
+async def flush_pending_messages():
+    """
+    Write all buffered messages with one pipeline (one RPUSH per list).
+    Readers on this worker call this first so they see their own writes; if
+    a batch is already being written they wait for it before returning.
+    """
+    global _pending_messages
+    async with _flush_lock:
+        if not _pending_messages:
+            return
+        pending, _pending_messages = _pending_messages, {}
+        pipe = ar.pipeline(transaction=False)
+        for key, entries in pending.items():
+            pipe.rpush(key, *entries)
+            pipe.expire(key, SESSION_TTL_SECONDS)
+        try:
+            await pipe.execute()
+        except BaseException:
+            # Put the batch back in front of anything buffered meanwhile
+            for key, entries in pending.items():
+                _pending_messages[key] = entries + _pending_messages.get(key, [])
+            raise
+
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(MESSAGE_WRITE_BEHIND_MS / 1000)
+        try:
+            await flush_pending_messages()
+        except Exception as e:
+            print(f"[ERROR] Flushing buffered messages failed: {e}")
 
 
 def get_messages_by_autoKey(session_id: str, autoKey: str) -> List[Dict]:
@@ -80,98 +227,429 @@ def get_messages_by_autoKey(session_id: str, autoKey: str) -> List[Dict]:
     return [json.loads(m) for m in raw_messages]
 
 
+async def get_messages_by_autoKey_async(session_id: str, autoKey: str) -> List[Dict]:
+    await flush_pending_messages()
+    key = f"session:{session_id}:auto:{autoKey}"
+    raw_messages = await ar.lrange(key, 0, -1)
+    return [json.loads(m) for m in raw_messages]
+
+
+def encode_embedding(embedding) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    # Zero-copy view over the Redis payload (read-only)
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def _memory_key(user_id: str, memory_id: str) -> str:
+    return f"{MEMORY_KEY_PREFIX}{user_id}:{memory_id}"
+
+
+def _memory_score(memory: Dict) -> float:
+    try:
+        return datetime.datetime.fromisoformat(memory["timestamp"].rstrip("Z")).timestamp()
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return datetime.datetime.utcnow().timestamp()
+
+
+def _write_memory(pipe, user_id: str, memory: Dict):
+    record = {k: v for k, v in memory.items() if k != "embedding" and v is not None}
+    if memory.get("embedding") is not None:
+        record["embedding"] = encode_embedding(memory["embedding"])
+    pipe.hset(_memory_key(user_id, memory["id"]), mapping=record)
+    pipe.zadd(f"{MEMORY_INDEX_KEY_PREFIX}{user_id}", {memory["id"]: _memory_score(memory)})
+
+
 def save_memory(user_id: str, memory: Dict):
     """
     Save a memory for a user.
     Memory should include: message, summary, embedding, tags, timestamp
+    Stored as one hash per memory (embedding as raw float32 bytes) plus an ordered id index.
     """
-    key = f"{MEMORY_KEY_PREFIX}{user_id}"
-    # Store as JSON string in Redis list
-    r.rpush(key, json.dumps(memory))
+    pipe = r_raw.pipeline()
+    _write_memory(pipe, user_id, memory)
+    pipe.incr(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+    pipe.execute()
+    _drop_memory_index(user_id)
 
 
-def get_memories(user_id: str) -> List[Dict]:
+def save_memories(user_id: str, memories: List[Dict]):
     """
-    Get all memories for a user with their unique IDs.
+    Save several memories for a user in one transactional round-trip.
     """
-    key = f"{MEMORY_KEY_PREFIX}{user_id}"
-    raw_memories = r.lrange(key, 0, -1)
+    if not memories:
+        return
+    pipe = r_raw.pipeline()
+    for memory in memories:
+        _write_memory(pipe, user_id, memory)
+    pipe.incr(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+    pipe.execute()
+    _drop_memory_index(user_id)
+
+
+def _decode_memory(raw: Dict) -> Dict:
+    memory = {
+        (k.decode() if isinstance(k, bytes) else k): v
+        for k, v in raw.items()
+    }
+    for field, value in memory.items():
+        if field != "embedding" and isinstance(value, bytes):
+            memory[field] = value.decode("utf-8")
+    if memory.get("embedding") is not None:
+        memory["embedding"] = decode_embedding(memory["embedding"])
+    return memory
+
+
+def _memory_ids(user_id: str) -> List[str]:
+    memory_ids = r.zrange(f"{MEMORY_INDEX_KEY_PREFIX}{user_id}", 0, -1)
+    return [m.decode() if isinstance(m, bytes) else m for m in memory_ids]
+
+
+def _load_memories(user_id: str) -> List[Dict]:
+    """
+    Fetch a user's memories, oldest first, with embeddings as float32 arrays.
+    """
+    pipe = r.pipeline(transaction=False)
+    pipe.zrange(f"{MEMORY_INDEX_KEY_PREFIX}{user_id}", 0, -1)
+    pipe.exists(f"{LEGACY_MEMORY_KEY_PREFIX}{user_id}")
+    memory_ids, has_legacy = pipe.execute()
+    if has_legacy:
+        migrate_memory_layout(user_id)
+        memory_ids = r.zrange(f"{MEMORY_INDEX_KEY_PREFIX}{user_id}", 0, -1)
+    memory_ids = [m.decode() if isinstance(m, bytes) else m for m in memory_ids]
+    if not memory_ids:
+        return []
+
+    pipe = r_raw.pipeline(transaction=False)
+    for memory_id in memory_ids:
+        pipe.hgetall(_memory_key(user_id, memory_id))
     mems_data = []
-    for mem in raw_memories:
-        mem_dict = json.loads(mem)
+    for raw in pipe.execute():
+        if not raw:
+            continue  # deleted between the index read and the fetch
+        memory = _decode_memory(raw)
         mems_data.append({
-            "id": mem_dict.get("id"),  # unique id of the memory
-            "message": mem_dict.get("message"),  # the text content'
-            "embedding": mem_dict.get("embedding")
+            "id": memory.get("id"),  # unique id of the memory
+            "message": memory.get("message"),  # the text content'
+            "embedding": memory.get("embedding")
         })
     return mems_data
 
+
+def get_memories(user_id: str) -> List[Dict]:
+    """
+    Get all memories for a user with their unique IDs.
+    """
+    mems_data = _load_memories(user_id)
+    for mem in mems_data:
+        if isinstance(mem["embedding"], np.ndarray):
+            mem["embedding"] = mem["embedding"].tolist()
+    return mems_data
+
+
+def get_memories_page(user_id: str, cursor: str | None = None, limit: int = 50, fields=("id", "message")):
+    """
+    Read up to `limit` memories (oldest first) after `cursor`, fetching only `fields`.
+    Returns (memories, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor is None:
+        _migrate_if_legacy(user_id)
+    index_key = f"{MEMORY_INDEX_KEY_PREFIX}{user_id}"
+    if cursor is None:
+        page = r.zrange(index_key, 0, limit, withscores=True)
+    else:
+        # The cursor is "score:memory_id" of the last memory returned. Memories sharing
+        # that score are ordered by id, so the page resumes after it within the tie
+        score_text, _, last_id = cursor.partition(":")
+        score = float(score_text)
+        pipe = r.pipeline()
+        pipe.zrangebyscore(index_key, score, score, withscores=True)
+        pipe.zrangebyscore(index_key, f"({score!r}", "+inf", start=0, num=limit + 1, withscores=True)
+        ties, later = pipe.execute()
+        ties = [(m, s) for m, s in ties if (m.decode() if isinstance(m, bytes) else m) > last_id]
+        page = (ties + later)[:limit + 1]
+    page = [(m.decode() if isinstance(m, bytes) else m, s) for m, s in page]
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    fields = list(fields)
+    pipe = r_raw.pipeline(transaction=False)
+    for memory_id, _ in page:
+        pipe.hmget(_memory_key(user_id, memory_id), fields)
+    memories = []
+    for values in (pipe.execute() if page else []):
+        if all(v is None for v in values):
+            continue  # deleted between the index read and the fetch
+        memory = _decode_memory(dict(zip(fields, values)))
+        if isinstance(memory.get("embedding"), np.ndarray):
+            memory["embedding"] = memory["embedding"].tolist()
+        memories.append(memory)
+
+    next_cursor = f"{page[-1][1]!r}:{page[-1][0]}" if has_more else None
+    return memories, next_cursor
+
+
+def iter_memories(user_id: str, fields=("id", "message"), batch_size: int = 500):
+    """
+    Yield all of a user's memories page by page, for exports.
+    """
+    cursor = None
+    while True:
+        memories, cursor = get_memories_page(user_id, cursor, batch_size, fields)
+        yield from memories
+        if cursor is None:
+            return
+
+
+def get_memory(user_id: str, memory_id: str):
+    """Get a single memory by ID, or None."""
+    _migrate_if_legacy(user_id)
+    raw = r_raw.hgetall(_memory_key(user_id, memory_id))
+    if not raw:
+        return None
+    memory = _decode_memory(raw)
+    if memory.get("embedding") is not None:
+        memory["embedding"] = memory["embedding"].tolist()
+    return memory
+
 def delete_memories(user_id: str):
-    key = f"{MEMORY_KEY_PREFIX}{user_id}"
-    r.delete(key)
+    index_key = f"{MEMORY_INDEX_KEY_PREFIX}{user_id}"
+    memory_keys = [_memory_key(user_id, memory_id) for memory_id in _memory_ids(user_id)]
+    r.delete(index_key, f"{LEGACY_MEMORY_KEY_PREFIX}{user_id}", f"{LEGACY_MEMORY_EMBEDDING_KEY_PREFIX}{user_id}", *memory_keys)
+    invalidate_memory_index(user_id)
 
 
 def edit_memory(user_id: str, memory_id: str, new_message: str) -> bool:
     """Edit a memory by ID."""
-    key = f"{MEMORY_KEY_PREFIX}{user_id}"
-    raw_memories = r.lrange(key, 0, -1)
-    for idx, mem in enumerate(raw_memories):
-        mem_dict = json.loads(mem)
-        if mem_dict["id"] == memory_id:
-            mem_dict["message"] = new_message
-            r.lset(key, idx, json.dumps(mem_dict))
-            return True
-    return False
+    # A memory still in the legacy list has no hash yet and would look missing
+    _migrate_if_legacy(user_id)
+    key = _memory_key(user_id, memory_id)
+
+    def update(pipe):
+        # WATCH guards against a concurrent delete recreating a partial hash
+        if not pipe.exists(key):
+            return False
+        pipe.multi()
+        pipe.hset(key, "message", new_message)
+        pipe.incr(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+        return True
+
+    updated = r.transaction(update, key, value_from_callable=True)
+    if updated:
+        _drop_memory_index(user_id)
+    return updated
 
 def delete_memory(user_id: str, memory_id: str) -> bool:
     """Delete a memory by ID."""
-    key = f"{MEMORY_KEY_PREFIX}{user_id}"
-    raw_memories = r.lrange(key, 0, -1)
+    # Otherwise the legacy list would bring the deleted memory back on its next migration
+    _migrate_if_legacy(user_id)
+    pipe = r.pipeline()
+    pipe.delete(_memory_key(user_id, memory_id))
+    pipe.zrem(f"{MEMORY_INDEX_KEY_PREFIX}{user_id}", memory_id)
+    pipe.incr(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+    deleted, _, _ = pipe.execute()
+    _drop_memory_index(user_id)
+    return bool(deleted)
+
+
+def migrate_memory_layout(user_id: str) -> int:
+    """
+    Move a user's memories from the legacy JSON list (with inline or float32-hash
+    embeddings) to one hash per memory. Returns the number of memories moved.
+    """
+    legacy_key = f"{LEGACY_MEMORY_KEY_PREFIX}{user_id}"
+    legacy_embeddings_key = f"{LEGACY_MEMORY_EMBEDDING_KEY_PREFIX}{user_id}"
+    pipe = r_raw.pipeline(transaction=False)
+    pipe.lrange(legacy_key, 0, -1)
+    pipe.hgetall(legacy_embeddings_key)
+    raw_memories, raw_embeddings = pipe.execute()
+
+    pipe = r_raw.pipeline()
     for mem in raw_memories:
-        mem_dict = json.loads(mem)
-        if mem_dict["id"] == memory_id:
-            r.lrem(key, 1, json.dumps(mem_dict))
-            return True
-    return False
+        memory = json.loads(mem)
+        blob = raw_embeddings.get(memory["id"].encode())
+        if blob is not None:
+            memory["embedding"] = decode_embedding(blob)
+        _write_memory(pipe, user_id, memory)
+    pipe.delete(legacy_key, legacy_embeddings_key)
+    pipe.incr(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+    pipe.execute()
+    _drop_memory_index(user_id)
+    return len(raw_memories)
+
+
+def _migrate_if_legacy(user_id: str):
+    if r.exists(f"{LEGACY_MEMORY_KEY_PREFIX}{user_id}"):
+        migrate_memory_layout(user_id)
+
+
+def _escape_tag(value: str) -> str:
+    return re.sub(r"([^A-Za-z0-9_])", r"\\\1", value)
+
+
+def _use_vector_index() -> bool:
+    """
+    True when the redisearch backend is configured and the module is loaded.
+    Creates the index on first use.
+    """
+    global _vector_index_available
+    if MEMORY_SEARCH_BACKEND != "redisearch":
+        return False
+    if _vector_index_available is None:
+        try:
+            try:
+                r.ft(MEMORY_VECTOR_INDEX).info()
+            except redis.exceptions.ResponseError as e:
+                if "unknown command" in str(e).lower():
+                    raise
+                r.ft(MEMORY_VECTOR_INDEX).create_index(
+                    [
+                        TagField("user_id"),
+                        TextField("message"),
+                        VectorField("embedding", MEMORY_VECTOR_ALGORITHM, {
+                            "TYPE": "FLOAT32",
+                            "DIM": EMBEDDING_DIM,
+                            "DISTANCE_METRIC": "COSINE",
+                        }),
+                    ],
+                    definition=IndexDefinition(prefix=[MEMORY_KEY_PREFIX], index_type=IndexType.HASH),
+                )
+            _vector_index_available = True
+        except redis.exceptions.ResponseError as e:
+            print(f"[WARN] RediSearch unavailable, using in-process memory search: {e}")
+            _vector_index_available = False
+    return _vector_index_available
+
+
+def _search_vector_index(user_id: str, query_embedding, top_n: int) -> List[Dict]:
+    query = (
+        Query(f"(@user_id:{{{_escape_tag(user_id)}}})=>[KNN {top_n} @embedding $vec AS score]")
+        .sort_by("score")
+        .return_fields("message", "score")
+        .paging(0, top_n)
+        .dialect(2)
+    )
+    result = r.ft(MEMORY_VECTOR_INDEX).search(query, query_params={"vec": encode_embedding(query_embedding)})
+    # Document ids are the memory hash keys: user_memory:{user_id}:{memory_id}
+    return [{"id": doc.id.rsplit(":", 1)[-1], "message": doc.message} for doc in result.docs]
+
+
+def _drop_memory_index(user_id: str):
+    with _memory_index_lock:
+        _memory_index_cache.pop(user_id, None)
+
+
+def invalidate_memory_index(user_id: str):
+    """
+    Drop the cached memory index for a user here and, via the version counter, on every other worker.
+    """
+    r.incr(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+    _drop_memory_index(user_id)
+
+
+def _get_memory_index(user_id: str):
+    """
+    Return (memories, normalized matrix) for a user, served from the in-process
+    LRU while the user's Redis version counter is unchanged.
+    """
+    # Read the version before loading so a concurrent write forces a reload next time
+    version = r.get(f"{MEMORY_VERSION_KEY_PREFIX}{user_id}")
+    with _memory_index_lock:
+        cached = _memory_index_cache.get(user_id)
+        if cached is not None and cached[0] == version:
+            _memory_index_cache.move_to_end(user_id)
+            _memory_index_stats["hits"] += 1
+            return cached[1], cached[2]
+        _memory_index_stats["misses"] += 1
+
+    all_memories = _load_memories(user_id)
+    valid_memories, matrix = _build_memory_matrix(all_memories)
+    with _memory_index_lock:
+        _memory_index_cache[user_id] = (version, valid_memories, matrix)
+        _memory_index_cache.move_to_end(user_id)
+        while len(_memory_index_cache) > MEMORY_INDEX_CACHE_SIZE:
+            _memory_index_cache.popitem(last=False)
+    return valid_memories, matrix
+
+
+def get_memory_index_stats() -> Dict:
+    with _memory_index_lock:
+        stats = dict(_memory_index_stats)
+        stats["size"] = len(_memory_index_cache)
+    return stats
+
+
+def _build_memory_matrix(memories: List[Dict]):
+    """
+    Stack valid memory embeddings into a row-normalized float32 matrix.
+    Returns the memories that made it into the matrix, in row order.
+    """
+    valid = []
+    rows = []
+    for idx, mem in enumerate(memories):
+        embedding = mem.get("embedding")
+        if embedding is None:
+            print(f"[DEBUG] Memory at index {idx} has no 'embedding' key: {mem}")
+            continue
+        if not isinstance(embedding, (list, tuple, np.ndarray)):
+            print(f"[DEBUG] Memory at index {idx} has invalid embedding type: {type(embedding)} | Value: {embedding}")
+            continue
+        if len(embedding) == 0:
+            print(f"[DEBUG] Memory at index {idx} has empty embedding: {mem}")
+            continue
+        if rows and len(embedding) != len(rows[0]):
+            print(f"[ERROR] Memory at index {idx} has embedding of size {len(embedding)}, expected {len(rows[0])}")
+            continue
+        valid.append(mem)
+        rows.append(embedding)
+
+    if not rows:
+        return valid, np.empty((0, 0), dtype=np.float32)
+
+    matrix = np.asarray(rows, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= norms + 1e-8
+    return valid, matrix
+
+
+def _top_k_indices(matrix: np.ndarray, query_embedding, top_n: int) -> np.ndarray:
+    """
+    Indices of the top_n rows of a normalized matrix by cosine similarity, best first.
+    """
+    if top_n <= 0:
+        return np.arange(0)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / (np.linalg.norm(query) + 1e-8)
+    scores = matrix @ query
+    if top_n < len(scores):
+        candidates = np.argpartition(scores, -top_n)[-top_n:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
 
 
 def get_relevant_memories(user_id: str, query_embedding: List[float], top_n: int = 5) -> List[Dict]:
     """
     Return top N memories most relevant to the query embedding
     """
-    all_memories = get_memories(user_id)
-    if not all_memories:
-        print(f"[DEBUG] No memories found for user {user_id}")
+    if top_n <= 0:
         return []
-
-    def cosine(a, b):
-        return sum(x*y for x, y in zip(a, b)) / (
-            (sum(x*x for x in a)**0.5) * (sum(y*y for y in b)**0.5) + 1e-8
-        )
-
-    scored = []
-    for idx, mem in enumerate(all_memories):
+    if _use_vector_index():
+        # The KNN path skips _load_memories, so migrate legacy lists here before they are indexed
+        _migrate_if_legacy(user_id)
         try:
-            if "embedding" not in mem:
-                print(f"[DEBUG] Memory at index {idx} has no 'embedding' key: {mem}")
-                continue
-            embedding = mem["embedding"]
-
-            if not isinstance(embedding, (list, tuple)):
-                print(f"[DEBUG] Memory at index {idx} has invalid embedding type: {type(embedding)} | Value: {embedding}")
-                continue
-            if not embedding:
-                print(f"[DEBUG] Memory at index {idx} has empty embedding: {mem}")
-                continue
-
-            score = cosine(query_embedding, embedding)
-            scored.append((mem, score))
-        except Exception as e:
-            print(f"[ERROR] Failed processing memory at index {idx}: {mem} | Error: {e}")
+            return _search_vector_index(user_id, query_embedding, top_n)
+        except redis.exceptions.ResponseError as e:
+            print(f"[ERROR] Vector search failed for user {user_id}, falling back to in-process scan: {e}")
 
-    if not scored:
-        print(f"[DEBUG] No valid memories scored for user {user_id}")
+    valid_memories, matrix = _get_memory_index(user_id)
+    if not valid_memories:
+        print(f"[DEBUG] No memories found for user {user_id}")
+        return []
+    if matrix.shape[1] != len(query_embedding):
+        print(f"[ERROR] Query embedding size {len(query_embedding)} does not match memories ({matrix.shape[1]}) for user {user_id}")
         return []
 
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return [mem for mem, score in scored[:top_n]]
\ No newline at end of file
+    return [valid_memories[i] for i in _top_k_indices(matrix, query_embedding, top_n)]
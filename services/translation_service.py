@@ -1,49 +1,459 @@
+import asyncio
+import concurrent.futures
+import hashlib
 import os
-from cerebras.cloud.sdk import Cerebras
-from cerebras.cloud.sdk.types import completion
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING
 from config import CEREBRAS_API_KEY
 from config import REDIS_HOST
+from config import TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL_SECONDS
 from models.translation import TranslationResponse
 from services import redis_service
 import json
 
 from services.embedding_service import get_embedding
 
-client = Cerebras(api_key=CEREBRAS_API_KEY)
+if TYPE_CHECKING:
+    # Imported lazily at runtime: the SDK (httpx, pydantic models) slows every worker's boot
+    from cerebras.cloud.sdk import AsyncCerebras, Cerebras
 
-def get_contextual_memory(text: str):
-    response = client.chat.completions.create(
+# Created on first use
+_client = None
+# Shared non-blocking client for the WebSocket loop; reuses one HTTP connection pool
+_async_client = None
+_client_lock = Lock()
+
+TRANSLATION_MODEL = "llama-3.3-70b"
+TRANSLATION_CACHE_KEY_PREFIX = "translation_cache:"
+
+# Translation cache: cache key -> translated text
+_translation_cache = OrderedDict()
+_translation_cache_lock = Lock()
+_translation_cache_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+# Prompt token usage per call type: call name -> counters
+_prompt_token_stats = {}
+_prompt_token_stats_lock = Lock()
+
+# Single-flight: request hash -> in-flight call shared by identical concurrent requests
+_inflight_sync = {}
+_inflight_async = {}
+_single_flight_lock = Lock()
+_single_flight_stats = {"requests": 0, "coalesced": 0}
+
+# System prompts are static so the provider can reuse the cached prompt prefix;
+# per-call content (languages, memories, history) goes in the user message.
+CONTEXTUAL_MEMORY_PROMPT = (
+    "Summarize the user message into a short, context-rich memory capturing their intent or preference. Keep it concise and natural, and include the category (food, sports, books, hobbies, etc.) if obvious ( insert it in the memory sentence , don't use parenthesis ). Output only the memory without extra details."
+)
+CONTEXTUAL_MEMORIES_PROMPT = (
+    CONTEXTUAL_MEMORY_PROMPT
+    + " You will receive a JSON array of user messages; return one memory per message, in the same order."
+)
+TRANSLATE_PROMPT = (
+    "You are a translation assistant (conversational). "
+    "Just translate the sentence from the source language to the target language given in the request, "
+    "the translated sentence should be in the target language, don't add any extra words"
+)
+SLATE_TRANSLATE_PROMPT = (
+    "You are a translation assistant. "
+    "Translate text from the host language to the target language given in the request. "
+)
+SLATE_ENRICH_PROMPT = (
+    SLATE_TRANSLATE_PROMPT
+    + "Enrich the input sentence slightly in the host language (make it clearer, more natural) and then translate the same,"
+    "If you sense any intent in the input sentence, use the provided memories and enrich the sentence, don't add the intent in response."
+    "\nIf memories are provided and you use them to enrich the translation, set memory_backed=True, else False."
+    " If no memories are provided, always return memory_backed=False."
+)
+SLATE_PLAIN_PROMPT = (
+    SLATE_TRANSLATE_PROMPT
+    + "Do NOT enrich the host sentence, only return it exactly as provided. "
+    "\nIf memories are provided and you use them to enrich the translation, set memory_backed=True, else False."
+    " If no memories are provided, always return memory_backed=False."
+)
+AUTO_REPLY_PROMPT = (
+    "You are an automatic conversation agent. You'll be given chat history and host memories. "
+    "Reply appropriately on behalf of host, and indicate whether the conversation has ended."
+)
+SUGGESTIONS_PROMPT = (
+    "You are a helpful assistant generating chatting suggestions.Between host and guest. "
+    "Generate 3 very short, helpful, polite, suitable chat suggesions for the next message from the given role, "
+    "in the given language, based on the last message from the other side. Don't add any extra words or explanations"
+)
+SUGGESTIONS_HOST_PROMPT = (
+    SUGGESTIONS_PROMPT
+    + ", and consider the information provided by the user to generate suggestions."
+)
+
+
+def _json_schema_format(name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": schema
+        }
+    }
+
+
+CONTEXTUAL_MEMORIES_FORMAT = _json_schema_format("contextual_memories_schema", {
+    "type": "object",
+    "properties": {
+        "memories": {
+            "type": "array",
+            "items": {"type": "string"}
+        }
+    },
+    "required": ["memories"],
+    "additionalProperties": False
+})
+SLATE_TRANSLATE_FORMAT = _json_schema_format("slate_translate_schema", {
+    "type": "object",
+    "properties": {
+        "host_language": {
+            "type": "string",
+            "description": "Sentence in the host language. Enriched if enrich=True."
+        },
+        "guest_language": {
+            "type": "string",
+            "description": "Sentence in the guest (target) language."
+        },
+        "memory_backed": {
+            "type": "boolean",
+            "description": "True if relevant memories influenced translation, else False."
+        }
+    },
+    "required": ["host_language", "guest_language", "memory_backed"],
+    "additionalProperties": False
+})
+AUTO_REPLY_FORMAT = _json_schema_format("auto_reply_schema", {
+    "type": "object",
+    "properties": {
+        "reply": {
+            "type": "string",
+            "description": "The agent’s reply to the guest (a follow-up, greeting, or appropriate message)."
+        },
+        "end_chat": {
+            "type": "boolean",
+            "description": "True if the conversation seems concluded, otherwise false."
+        }
+    },
+    "required": ["reply", "end_chat"],
+    "additionalProperties": False
+})
+SUGGESTIONS_FORMAT = _json_schema_format("chat_suggestions_schema", {
+    "type": "object",
+    "properties": {
+        "chat_suggestions": {
+            "type": "array",
+            "items": {"type": "string"}
+        }
+    },
+    "required": ["chat_suggestions"],
+    "additionalProperties": False
+})
+
+
+def _get_client() -> "Cerebras":
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from cerebras.cloud.sdk import Cerebras
+                _client = Cerebras(api_key=CEREBRAS_API_KEY)
+    return _client
+
+
+def _get_async_client() -> "AsyncCerebras":
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from cerebras.cloud.sdk import AsyncCerebras
+                _async_client = AsyncCerebras(api_key=CEREBRAS_API_KEY)
+    return _async_client
+
+
+def _record_usage(call: str, response):
+    """
+    Add a response's prompt token counts (and provider-cached prefix tokens, when reported) to the stats.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+    with _prompt_token_stats_lock:
+        stats = _prompt_token_stats.setdefault(call, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "last_prompt_tokens": 0})
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+        stats["last_prompt_tokens"] = prompt_tokens
+
+def _request_key(request: dict) -> str:
+    return hashlib.sha1(json.dumps(request, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+def _count_request(coalesced: bool):
+    with _single_flight_lock:
+        _single_flight_stats["requests"] += 1
+        if coalesced:
+            _single_flight_stats["coalesced"] += 1
+
+def _create(call: str, **request):
+    """
+    Blocking chat completion. Identical requests already in flight on another
+    thread wait for that call and share its response instead of calling again.
+    """
+    key = _request_key(request)
+    with _single_flight_lock:
+        future = _inflight_sync.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight_sync[key] = concurrent.futures.Future()
+    _count_request(not leader)
+    if not leader:
+        return future.result()
+    try:
+        response = _get_client().chat.completions.create(**request)
+        _record_usage(call, response)
+        future.set_result(response)
+        return response
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _single_flight_lock:
+            _inflight_sync.pop(key, None)
+
+async def _create_async(call: str, **request):
+    """
+    Non-blocking _create(): concurrent identical requests on this event loop share one call.
+    """
+    key = _request_key(request)
+    task = _inflight_async.get(key)
+    _count_request(task is not None)
+    if task is None:
+        async def run():
+            response = await _get_async_client().chat.completions.create(**request)
+            _record_usage(call, response)
+            return response
+        task = _inflight_async[key] = asyncio.create_task(run())
+        task.add_done_callback(lambda t: _inflight_async.pop(key, None) if _inflight_async.get(key) is t else None)
+    # Shielded so one cancelled waiter does not cancel the call for the others
+    return await asyncio.shield(task)
+
+def get_single_flight_stats() -> dict:
+    with _single_flight_lock:
+        stats = dict(_single_flight_stats)
+    stats["in_flight"] = len(_inflight_sync) + len(_inflight_async)
+    stats["coalesced_ratio"] = stats["coalesced"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
+def get_prompt_token_stats() -> dict:
+    with _prompt_token_stats_lock:
+        stats = {call: dict(counters) for call, counters in _prompt_token_stats.items()}
+    for counters in stats.values():
+        counters["avg_prompt_tokens"] = counters["prompt_tokens"] / counters["calls"]
+        counters["cached_ratio"] = counters["cached_tokens"] / counters["prompt_tokens"] if counters["prompt_tokens"] else 0.0
+    return stats
+
+def _contextual_memory_request(text: str) -> dict:
+    return dict(
         model="llama3.1-8b",
         messages=[
             {
                 "role": "system",
-                "content": (
-                   "Summarize the user message into a short, context-rich memory capturing their intent or preference. Keep it concise and natural, and include the category (food, sports, books, hobbies, etc.) if obvious ( insert it in the memory sentence , don't use parenthesis ). Output only the memory without extra details."
-                )
+                "content": CONTEXTUAL_MEMORY_PROMPT
             },
             {"role": "user", "content": text}
         ]
     )
+
+def get_contextual_memory(text: str):
+    response = _create("contextual_memory", **_contextual_memory_request(text))
     memory_sentence = response.choices[0].message.content
     return memory_sentence
 
-def translate(text: str, source_lang: str, target_lang: str) -> TranslationResponse:
-    response = client.chat.completions.create(
-        model="llama-3.3-70b",
+async def get_contextual_memory_async(text: str):
+    response = await _create_async("contextual_memory", **_contextual_memory_request(text))
+    return response.choices[0].message.content
+
+async def get_contextual_memories_async(texts: list[str]) -> list[str]:
+    """
+    Summarize several user messages into memories with a single LLM call.
+    Falls back to one call per message if the model returns the wrong count.
+    """
+    if not texts:
+        return []
+    if len(texts) == 1:
+        return [await get_contextual_memory_async(texts[0])]
+
+    response = await _create_async(
+        "contextual_memories",
+        model="llama3.1-8b",
         messages=[
-            {
-                "role": "system",
-                "content": (
-                    f"You are a translation assistant (conversational)."
-                    f"Just translate from {source_lang} to {target_lang}, the translated sentence should be in {target_lang}, don't add any extra words"
-                )
-            },
-            {"role": "user", "content": f"Translate this sentence : {text}"}
+            {"role": "system", "content": CONTEXTUAL_MEMORIES_PROMPT},
+            {"role": "user", "content": json.dumps(texts, ensure_ascii=False)}
+        ],
+        response_format=CONTEXTUAL_MEMORIES_FORMAT
+    )
+    try:
+        memories = json.loads(response.choices[0].message.content)["memories"]
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[WARN] Batch memory summary unreadable: {e}")
+        memories = []
+    if len(memories) != len(texts):
+        print(f"[WARN] Batch memory summary returned {len(memories)} items for {len(texts)} messages, summarizing one by one")
+        memories = await asyncio.gather(*[get_contextual_memory_async(text) for text in texts])
+    return list(memories)
+
+def _translate_request(text: str, source_lang: str, target_lang: str) -> dict:
+    return dict(
+        model=TRANSLATION_MODEL,
+        messages=[
+            {"role": "system", "content": TRANSLATE_PROMPT},
+            {"role": "user", "content": f"Source language: {source_lang}\nTarget language: {target_lang}\nTranslate this sentence : {text}"}
         ]
     )
+
+def _translation_cache_key(text: str, source_lang: str, target_lang: str) -> str:
+    normalized = " ".join(text.split())
+    raw = f"{TRANSLATION_MODEL}\0{source_lang}\0{target_lang}\0{normalized}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _get_local_translation(key: str):
+    with _translation_cache_lock:
+        translated_text = _translation_cache.get(key)
+        if translated_text:
+            _translation_cache.move_to_end(key)
+            _translation_cache_stats["local_hits"] += 1
+        return translated_text or None
+
+def _remember_remote_translation(key: str, translated_text):
+    if isinstance(translated_text, bytes):
+        translated_text = translated_text.decode("utf-8")
+    with _translation_cache_lock:
+        if not translated_text:
+            _translation_cache_stats["misses"] += 1
+            return None
+        _translation_cache_stats["redis_hits"] += 1
+    _put_local_translation(key, translated_text)
+    return translated_text
+
+def _put_local_translation(key: str, translated_text: str):
+    with _translation_cache_lock:
+        _translation_cache[key] = translated_text
+        _translation_cache.move_to_end(key)
+        while len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+            _translation_cache.popitem(last=False)
+
+def _get_cached_translation(key: str):
+    translated_text = _get_local_translation(key)
+    if translated_text is not None:
+        return translated_text
+    try:
+        translated_text = redis_service.r.get(f"{TRANSLATION_CACHE_KEY_PREFIX}{key}")
+    except Exception as e:
+        print(f"[WARN] Translation cache lookup failed: {e}")
+        translated_text = None
+    return _remember_remote_translation(key, translated_text)
+
+async def _get_cached_translation_async(key: str):
+    translated_text = _get_local_translation(key)
+    if translated_text is not None:
+        return translated_text
+    try:
+        translated_text = await redis_service.ar.get(f"{TRANSLATION_CACHE_KEY_PREFIX}{key}")
+    except Exception as e:
+        print(f"[WARN] Translation cache lookup failed: {e}")
+        translated_text = None
+    return _remember_remote_translation(key, translated_text)
+
+def _put_cached_translation(key: str, translated_text: str):
+    _put_local_translation(key, translated_text)
+    try:
+        redis_service.r.setex(f"{TRANSLATION_CACHE_KEY_PREFIX}{key}", TRANSLATION_CACHE_TTL_SECONDS, translated_text)
+    except Exception as e:
+        print(f"[WARN] Translation cache write failed: {e}")
+
+async def _put_cached_translation_async(key: str, translated_text: str):
+    _put_local_translation(key, translated_text)
+    try:
+        await redis_service.ar.setex(f"{TRANSLATION_CACHE_KEY_PREFIX}{key}", TRANSLATION_CACHE_TTL_SECONDS, translated_text)
+    except Exception as e:
+        print(f"[WARN] Translation cache write failed: {e}")
+
+def get_translation_cache_stats() -> dict:
+    with _translation_cache_lock:
+        stats = dict(_translation_cache_stats)
+        stats["size"] = len(_translation_cache)
+    lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["local_hits"] + stats["redis_hits"]) / lookups if lookups else 0.0
+    return stats
+
+def translate(text: str, source_lang: str, target_lang: str, use_cache: bool = True) -> TranslationResponse:
+    """
+    Translate a chat line. Pass use_cache=False to always ask the model.
+    """
+    key = _translation_cache_key(text, source_lang, target_lang)
+    if use_cache:
+        cached = _get_cached_translation(key)
+        if cached is not None:
+            return TranslationResponse(translated_text=cached)
+    response = _create("translate", **_translate_request(text, source_lang, target_lang))
+    translated_text = response.choices[0].message.content
+    _put_cached_translation(key, translated_text)
+    return TranslationResponse(translated_text=translated_text)
+
+async def translate_async(text: str, source_lang: str, target_lang: str, use_cache: bool = True) -> TranslationResponse:
+    """
+    Non-blocking variant of translate() for use inside the WebSocket loop.
+    """
+    key = _translation_cache_key(text, source_lang, target_lang)
+    if use_cache:
+        cached = await _get_cached_translation_async(key)
+        if cached is not None:
+            return TranslationResponse(translated_text=cached)
+    response = await _create_async("translate", **_translate_request(text, source_lang, target_lang))
     translated_text = response.choices[0].message.content
+    await _put_cached_translation_async(key, translated_text)
     return TranslationResponse(translated_text=translated_text)
 
+async def translate_stream(text: str, source_lang: str, target_lang: str, use_cache: bool = True):
+    """
+    Streaming variant of translate_async(): yields the translation in deltas
+    as the model produces them. A cached translation is yielded in one piece.
+    """
+    key = _translation_cache_key(text, source_lang, target_lang)
+    if use_cache:
+        cached = await _get_cached_translation_async(key)
+        if cached is not None:
+            yield cached
+            return
+    stream = await _get_async_client().chat.completions.create(
+        **_translate_request(text, source_lang, target_lang),
+        stream=True
+    )
+    parts = []
+    finish_reason = None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            _record_usage("translate", chunk)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        finish_reason = chunk.choices[0].finish_reason or finish_reason
+        if delta:
+            parts.append(delta)
+            yield delta
+    # Only a completed, non-empty translation is worth caching
+    if parts and finish_reason == "stop":
+        await _put_cached_translation_async(key, "".join(parts))
+
 def slate_translate(
     user_id:str,
     text: str,
@@ -71,70 +481,22 @@ def slate_translate(
     presets = presets or []
     memories = input_memories
 
-    # JSON schema for structured output
-    slate_translate_schema = {
-        "type": "object",
-        "properties": {
-            "host_language": {
-                "type": "string",
-                "description": f"Sentence in host language ({source_lang}). Enriched if enrich=True."
-            },
-            "guest_language": {
-                "type": "string",
-                "description": f"Sentence in guest language ({target_lang})."
-            },
-            "memory_backed": {
-                "type": "boolean",
-                "description": "True if relevant memories influenced translation, else False."
-            }
-        },
-        "required": ["host_language", "guest_language", "memory_backed"],
-        "additionalProperties": False
-    }
-
-    # Build system prompt dynamically
-    base_instruction = (
-        f"You are a translation assistant. "
-        f"Translate text from host language : {source_lang} to target language : {target_lang}. "
-    )
-
-    if enrich:
-        base_instruction += (
-            "Enrich the input sentence slightly in the host language (make it clearer, more natural) and then translate the same,"
-            "If you sense any intent in the input sentence, use the provided memories and enrich the sentence, don't add the intent in response."
-        )
-    else:
-        base_instruction += (
-            "Do NOT enrich the host sentence, only return it exactly as provided. "
-        )
-
+    request_lines = [f"Host language: {source_lang}", f"Target language: {target_lang}"]
     if presets:
-        base_instruction += f"\nUser wants the translation to be : {', '.join(presets)}."
+        request_lines.append(f"User wants the translation to be : {', '.join(presets)}.")
     if memories:
-        base_instruction += (
-            f"\nHere are some relevant past memories: {', '.join(memories)}. "
-            "If you use them to enrich the translation, set memory_backed=True, else False."
-        )
-    else:
-        base_instruction += "\nIf no memories are provided, always return memory_backed=False."
+        request_lines.append(f"Here are some relevant past memories: {', '.join(memories)}.")
+    request_lines.append(f"Translate this sentence: {text}")
 
     # Call model
-    print(f"Base : {base_instruction}",flush=True)
-    print(f"Base : {base_instruction}")
-    response = client.chat.completions.create(
+    response = _create(
+        "slate_translate",
         model="llama-3.3-70b",
         messages=[
-            {"role": "system", "content": base_instruction},
-            {"role": "user", "content": f"Translate this sentence: {text}"}
+            {"role": "system", "content": SLATE_ENRICH_PROMPT if enrich else SLATE_PLAIN_PROMPT},
+            {"role": "user", "content": "\n".join(request_lines)}
         ],
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "slate_translate_schema",
-                "strict": True,
-                "schema": slate_translate_schema
-            }
-        }
+        response_format=SLATE_TRANSLATE_FORMAT
     )
 
     # Parse response safely
@@ -162,106 +524,84 @@ def slate_translate(
         }
 
 
-# def auto_reply(agent_memories,chat_history):
-#        response = client.chat.completions.create(
-#         model="llama-3.3-70b",
-#         messages=[
-#             {
-#                 "role": "system",
-#                 "content": (
-#                     f"You are automatic conversation agent, You'll be given a history of chat between host and guest, Based on the given chat and the host memories"
-#                     f",give an appopriate reply to guest, it can be a follow up question, a greeting or complement. If you think the conversation is concluded, return end_chat:true."
-#                     f"Host memories:{agent_memories}"
-#                 )
-#             },
-#             {"role": "user", "content": f"{chat_history}"}
-#         ]
-#     )
+def _auto_reply_request(agent_memories, chat_history) -> dict:
+    return dict(
+        model="llama-3.3-70b",
+        messages=[
+            {"role": "system", "content": AUTO_REPLY_PROMPT},
+            {"role": "user", "content": f"Host memories: {agent_memories}\n\nChat history:\n{chat_history}"}
+        ],
+        response_format=AUTO_REPLY_FORMAT
+    )
 
 def auto_reply(agent_memories, chat_history):
-    auto_reply_schema = {
-        "type": "object",
-        "properties": {
-            "reply": {
-                "type": "string",
-                "description": "The agent’s reply to the guest (a follow-up, greeting, or appropriate message)."
-            },
-            "end_chat": {
-                "type": "boolean",
-                "description": "True if the conversation seems concluded, otherwise false."
-            }
-        },
-        "required": ["reply", "end_chat"],
-        "additionalProperties": False
-    }
+    response = _create("auto_reply", **_auto_reply_request(agent_memories, chat_history))
+    return response.choices[0].message.content
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b",
+async def auto_reply_async(agent_memories, chat_history):
+    response = await _create_async("auto_reply", **_auto_reply_request(agent_memories, chat_history))
+    return response.choices[0].message.content
+
+
+async def summarize_history_async(previous_summary: str, new_turns: str) -> str:
+    """
+    Fold new chat turns into the running summary of an auto-mode conversation.
+    """
+    response = await _create_async(
+        "summarize_history",
+        model="llama3.1-8b",
         messages=[
             {
                 "role": "system",
                 "content": (
-                    "You are an automatic conversation agent. You'll be given chat history and host memories. "
-                    "Reply appropriately on behalf of host, and indicate whether the conversation has ended."
-                    f"\nHost memories: {agent_memories}"
+                    "You maintain a running summary of a chat between a host and a guest. "
+                    "Update the summary with the new turns, keeping names, preferences, requests and open questions. "
+                    "Keep it under 120 words. Output only the updated summary."
                 )
             },
-            {"role": "user", "content": f"Chat history:\n{chat_history}"}
-        ],
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "auto_reply_schema",
-                "strict": True,
-                "schema": auto_reply_schema
-            }
-        }
+            {"role": "user", "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{new_turns}"}
+        ]
     )
     return response.choices[0].message.content
 
 
-def generate_suggestions(session_id: str,role:str,target_lang:str,agent_memories) -> list[str]:
-    history = redis_service.get_recent_messages(session_id, n=4)
-    if not history:
-        return []
-
+def _suggestions_request(history, role: str, target_lang: str, agent_memories) -> dict:
     # Flatten chat history
     history_text = "\n".join([
         f"{msg['role']}: {msg['original']}" for msg in history
     ])
 
-    suggestion_schema = {
-        "type": "object",
-        "properties": {
-            "chat_suggestions": {
-                "type": "array",
-                "items": {"type": "string"}
-            }
-        },
-        "required": ["chat_suggestions"],
-        "additionalProperties": False
-    }
     print(f"Generating suggestions for {role}",flush=True)
     if role == 'host':
-        suggestion_prompt = f"You are a helpful assistant generating chatting suggestions.Between host and guest. Generate 3 very short, helpful, polite, suitable chat suggesions for the next message from {role} in {target_lang} based on the last message from the guest. Don't add any extra words or explanations, and consider the following information provided by the user to generate suggestion : {agent_memories}"
+        system_prompt = SUGGESTIONS_HOST_PROMPT
+        context = f"Information provided by the user: {agent_memories}\n"
     else:
-        suggestion_prompt = f"You are a helpful assistant generating chatting suggestions.Between host and guest. Generate 3 very short, helpful, polite, suitable chat suggesions for the next message from {role} in {target_lang} based on the last message from the host. Don't add any extra words or explanations"
-    response = client.chat.completions.create(
+        system_prompt = SUGGESTIONS_PROMPT
+        context = ""
+    return dict(
         model="llama-3.3-70b",
         messages=[
-            {"role": "system", "content": suggestion_prompt},
-            {"role": "user", "content": f"Based on this recent chat:\n{history_text}\n\n , provide chat suggestions for {role}."}
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Role: {role}\nLanguage: {target_lang}\n{context}Based on this recent chat:\n{history_text}\n\n , provide chat suggestions for {role}."}
         ],
-        response_format={
-            "type": "json_schema", 
-            "json_schema": {
-                "name": "chat_suggestions_schema",
-                "strict": True,
-                "schema": suggestion_schema
-            }
-        }
+        response_format=SUGGESTIONS_FORMAT
     )
-    print(suggestion_prompt)
+
+def _parse_suggestions(response) -> list[str]:
     suggestions = json.loads(response.choices[0].message.content)
     print(suggestions.get("chat_suggestions"),flush=True)
     return suggestions.get("chat_suggestions")
+
+def generate_suggestions(session_id: str,role:str,target_lang:str,agent_memories) -> list[str]:
+    history = redis_service.get_recent_messages(session_id, n=4)
+    if not history:
+        return []
+    response = _create("suggestions", **_suggestions_request(history, role, target_lang, agent_memories))
+    return _parse_suggestions(response)
+
+async def generate_suggestions_async(session_id: str,role:str,target_lang:str,agent_memories) -> list[str]:
+    history = await redis_service.get_recent_messages_async(session_id, n=4)
+    if not history:
+        return []
+    response = await _create_async("suggestions", **_suggestions_request(history, role, target_lang, agent_memories))
+    return _parse_suggestions(response)
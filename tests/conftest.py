@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Importing the services builds Redis clients from the environment; no server is contacted.
+os.environ.setdefault("REDIS_HOST", "redis://localhost:6379/0?decode_responses=True")
+os.environ.setdefault("CEREBRAS_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,160 @@
+import asyncio
+import importlib.util
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from services import broadcast_service
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_json(self, payload):
+        self.received.append(payload)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _node(module, monkeypatch, server):
+    """
+    Reset a broadcast_service module to a fresh node on the shared fake server.
+    """
+    monkeypatch.setattr(module, "_client", fakeredis.aioredis.FakeRedis(server=server))
+    monkeypatch.setattr(module, "local_connections", {})
+    monkeypatch.setattr(module, "_streaming_sockets", set())
+    monkeypatch.setattr(module, "_session_queues", {})
+    monkeypatch.setattr(module, "_pubsub", None)
+    monkeypatch.setattr(module, "_listener", None)
+    monkeypatch.setattr(module, "_heartbeat", None)
+    return module
+
+
+async def _settle(*sockets, count):
+    # Pub/Sub delivery goes through the listener task and the session queue
+    for _ in range(200):
+        if all(len(s.received) >= count for s in sockets):
+            return
+        await asyncio.sleep(0.01)
+
+
+async def _stop(*nodes):
+    for node in nodes:
+        for task in [node._listener, node._heartbeat] + [task for _, task in node._session_queues.values()]:
+            if task is not None:
+                task.cancel()
+        if node._pubsub is not None:
+            await node._pubsub.aclose()
+
+
+def test_partials_only_reach_streaming_sockets(monkeypatch, server):
+    node = _node(broadcast_service, monkeypatch, server)
+    ui, streaming = FakeSocket(), FakeSocket()
+
+    async def run():
+        await node.register("s1", ui, "host")
+        await node.register("s1", streaming, "host", streaming=True)
+        try:
+            await node.publish("s1", {"type": "partial", "delta": "Hol"}, streaming_only=True)
+            await node.publish("s1", {"from": "guest", "translated": "Hola"})
+            await _settle(ui, streaming, count=1)
+            await _settle(streaming, count=2)
+        finally:
+            await _stop(node)
+
+    asyncio.run(run())
+
+    assert ui.received == [{"from": "guest", "translated": "Hola"}]
+    assert streaming.received == [{"type": "partial", "delta": "Hol"}, {"from": "guest", "translated": "Hola"}]
+
+
+@pytest.fixture
+def second_node():
+    """
+    A second copy of broadcast_service with its own NODE_ID, standing in for another worker.
+    """
+    spec = importlib.util.spec_from_file_location("broadcast_service_node_b", broadcast_service.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_nodes_have_distinct_ids(second_node):
+    assert second_node.NODE_ID != broadcast_service.NODE_ID
+
+
+def test_events_reach_sockets_on_other_nodes(monkeypatch, server, second_node):
+    node_a = _node(broadcast_service, monkeypatch, server)
+    node_b = _node(second_node, monkeypatch, server)
+    host, guest = FakeSocket(), FakeSocket()
+
+    async def run():
+        await node_a.register("s1", host, "host")
+        await node_b.register("s1", guest, "guest")
+        try:
+            await node_b.publish("s1", {"from": "guest", "translated": "hello"})
+            await _settle(host, guest, count=1)
+            roles = await node_a.session_roles("s1")
+        finally:
+            await _stop(node_a, node_b)
+        return roles
+
+    roles = asyncio.run(run())
+
+    assert host.received == [{"from": "guest", "translated": "hello"}]
+    assert guest.received == [{"from": "guest", "translated": "hello"}]
+    assert roles == {"host", "guest"}
+
+
+def test_roles_filter_applies_across_nodes(monkeypatch, server, second_node):
+    node_a = _node(broadcast_service, monkeypatch, server)
+    node_b = _node(second_node, monkeypatch, server)
+    host_a, host_b, guest = FakeSocket(), FakeSocket(), FakeSocket()
+
+    async def run():
+        await node_a.register("s1", host_a, "host")
+        await node_a.register("s1", guest, "guest")
+        await node_b.register("s1", host_b, "host")
+        try:
+            await node_a.publish("s1", {"type": "guest_joined"}, roles=["host"])
+            await node_a.publish("s1", {"type": "suggestions", "suggestions": ["hi"]}, roles=["guest"])
+            await _settle(host_a, host_b, guest, count=1)
+            await asyncio.sleep(0.05)  # give any misrouted event time to arrive
+        finally:
+            await _stop(node_a, node_b)
+
+    asyncio.run(run())
+
+    assert host_a.received == host_b.received == [{"type": "guest_joined"}]
+    assert guest.received == [{"type": "suggestions", "suggestions": ["hi"]}]
+
+
+def test_dead_node_presence_expires(monkeypatch, server, second_node):
+    node_a = _node(broadcast_service, monkeypatch, server)
+    node_b = _node(second_node, monkeypatch, server)
+    monkeypatch.setattr(node_b, "PRESENCE_TTL_SECONDS", 1)
+
+    async def run():
+        await node_a.register("s1", FakeSocket(), "host")
+        await node_b.register("s1", FakeSocket(), "guest")
+        try:
+            before = await node_a.session_roles("s1")
+            # Node b crashes: no unregister, and its heartbeat key runs out
+            node_b._heartbeat.cancel()
+            await asyncio.sleep(1.1)
+            after = await node_a.session_roles("s1")
+            fields = await node_a._client.hkeys(node_a._presence_key("s1"))
+        finally:
+            await _stop(node_a, node_b)
+        return before, after, fields
+
+    before, after, fields = asyncio.run(run())
+
+    assert before == {"host", "guest"}
+    assert after == {"host"}
+    assert [f.decode() for f in fields] == [f"{broadcast_service.NODE_ID}:host"]
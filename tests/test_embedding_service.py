@@ -0,0 +1,65 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from services import embedding_service
+
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+
+class FakePool:
+    """
+    Runs jobs in-process. The first `broken_pools` pools fail every submit,
+    like a pool whose worker died.
+    """
+    created = []
+    broken_pools = 1
+
+    def __init__(self, *args, **kwargs):
+        self.broken = len(FakePool.created) < FakePool.broken_pools
+        self.shut_down = False
+        FakePool.created.append(self)
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture
+def worker_pool(monkeypatch):
+    FakePool.created = []
+    monkeypatch.setattr(embedding_service, "EMBEDDING_WORKERS", 2)
+    monkeypatch.setattr(embedding_service, "ProcessPoolExecutor", FakePool)
+    monkeypatch.setattr(embedding_service, "_get_model", lambda: FakeModel())
+    monkeypatch.setattr(embedding_service, "_pool", None)
+    monkeypatch.setattr(embedding_service, "_warm", True)
+
+
+def test_broken_pool_is_replaced_and_the_encode_retried(worker_pool):
+    embeddings = embedding_service._encode(["hi", "hello"])
+
+    assert embeddings.tolist() == [[2.0, 1.0], [5.0, 1.0]]
+    broken, fresh = FakePool.created
+    assert broken.shut_down and embedding_service._pool is fresh
+    assert embedding_service.is_warm()
+
+
+def test_node_is_not_warm_while_the_pool_rebuild_fails(worker_pool, monkeypatch):
+    monkeypatch.setattr(FakePool, "broken_pools", 2)
+
+    with pytest.raises(BrokenProcessPool):
+        embedding_service._encode(["hi"])
+
+    assert len(FakePool.created) == 2
+    assert not embedding_service.is_warm()
@@ -0,0 +1,41 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from services import memory_jobs, redis_service
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_service, "r", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_service, "r_raw", fakeredis.FakeRedis(server=server))
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    async def summarize(messages):
+        return [f"summary of {m}" for m in messages]
+
+    monkeypatch.setattr(memory_jobs, "_summarize", summarize)
+    monkeypatch.setattr(memory_jobs, "get_embeddings", lambda texts: [[1.0, 0.0, 0.0]] * len(texts))
+
+
+def test_reprocessing_a_job_does_not_duplicate_its_memory(fake_redis, stub_models):
+    items = [("u1", "likes tea"), ("u1", "lives in Paris")]
+    job_ids = ["job-1", "job-2"]
+
+    first = asyncio.run(memory_jobs.process_memory_batch(items, job_ids))
+    # A worker crashed before marking the jobs done; the requeued jobs run again
+    again = asyncio.run(memory_jobs.process_memory_batch(items, job_ids))
+
+    assert [m["id"] for m in first] == [m["id"] for m in again] == job_ids
+    assert sorted(m["id"] for m in redis_service.get_memories("u1")) == job_ids
+
+
+def test_memory_ids_are_generated_without_job_ids(fake_redis, stub_models):
+    memories = asyncio.run(memory_jobs.process_memory_batch([("u1", "likes tea"), ("u1", "likes tea")]))
+
+    assert len({m["id"] for m in memories}) == 2
+    assert len(redis_service.get_memories("u1")) == 2
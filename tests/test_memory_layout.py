@@ -0,0 +1,46 @@
+import json
+
+import fakeredis
+import pytest
+
+from services import redis_service
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_service, "r", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_service, "r_raw", fakeredis.FakeRedis(server=server))
+
+
+def _save_legacy(user_id, count):
+    # Pre-hash layout: a JSON list with inline embeddings
+    redis_service.r.rpush(f"{redis_service.LEGACY_MEMORY_KEY_PREFIX}{user_id}", *[
+        json.dumps({"id": f"mem-{i}", "user_id": user_id, "message": f"memory {i}", "summary": f"memory {i}",
+                    "timestamp": f"2025-01-01T00:00:0{i}Z", "embedding": [float(i), 1.0]})
+        for i in range(count)
+    ])
+
+
+def test_edit_migrates_legacy_memories_first(fake_redis):
+    _save_legacy("u1", 3)
+
+    assert redis_service.edit_memory("u1", "mem-1", "edited")
+    assert redis_service.get_memory("u1", "mem-1")["message"] == "edited"
+    assert not redis_service.r.exists(f"{redis_service.LEGACY_MEMORY_KEY_PREFIX}u1")
+
+
+def test_deleted_legacy_memory_stays_deleted(fake_redis):
+    _save_legacy("u1", 3)
+
+    assert redis_service.delete_memory("u1", "mem-1")
+    assert [m["id"] for m in redis_service.get_memories("u1")] == ["mem-0", "mem-2"]
+
+
+def test_get_memory_reads_legacy_memories(fake_redis):
+    _save_legacy("u1", 2)
+
+    memory = redis_service.get_memory("u1", "mem-0")
+
+    assert memory["message"] == "memory 0"
+    assert memory["embedding"] == [0.0, 1.0]
@@ -0,0 +1,51 @@
+import fakeredis
+import pytest
+
+from services import redis_service
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_service, "r", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_service, "r_raw", fakeredis.FakeRedis(server=server))
+
+
+def _save(user_id, count, timestamp):
+    memories = [
+        {"id": f"mem-{i:02d}", "user_id": user_id, "message": f"memory {i}", "summary": f"memory {i}", "timestamp": timestamp}
+        for i in range(count)
+    ]
+    redis_service.save_memories(user_id, memories)
+    return [m["id"] for m in memories]
+
+
+def _read_all(user_id, limit):
+    ids, cursor = [], None
+    while True:
+        memories, cursor = redis_service.get_memories_page(user_id, cursor, limit, ("id",))
+        ids.extend(m["id"] for m in memories)
+        if cursor is None:
+            return ids
+
+
+def test_pages_do_not_skip_memories_sharing_a_timestamp(fake_redis):
+    saved = _save("u1", 5, "2025-01-01T00:00:00Z")
+
+    assert _read_all("u1", 2) == saved
+    assert [m["id"] for m in redis_service.iter_memories("u1", ("id",), batch_size=2)] == saved
+
+
+def test_ties_across_page_boundary_with_later_memories(fake_redis):
+    saved = _save("u1", 3, "2025-01-01T00:00:00Z")
+    redis_service.save_memories("u1", [
+        {"id": "later", "user_id": "u1", "message": "later", "summary": "later", "timestamp": "2025-01-02T00:00:00Z"}
+    ])
+
+    for limit in (1, 2, 3, 4):
+        assert _read_all("u1", limit) == saved + ["later"]
+
+
+def test_invalid_cursor_raises_value_error(fake_redis):
+    with pytest.raises(ValueError):
+        redis_service.get_memories_page("u1", "not-a-score:mem-00")
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pytest
+import redis
+
+from services import redis_service
+
+
+@pytest.fixture
+def redisearch(monkeypatch):
+    """
+    redis_service with the redisearch backend and a mocked client.
+    """
+    client = mock.MagicMock()
+    client.exists.return_value = 0
+    monkeypatch.setattr(redis_service, "r", client)
+    monkeypatch.setattr(redis_service, "MEMORY_SEARCH_BACKEND", "redisearch")
+    monkeypatch.setattr(redis_service, "_vector_index_available", None)
+    return client
+
+
+def _local_index(monkeypatch):
+    memories = [{"id": "a", "message": "likes tea"}, {"id": "b", "message": "likes football"}]
+    matrix = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    monkeypatch.setattr(redis_service, "_get_memory_index", mock.Mock(return_value=(memories, matrix)))
+
+
+def test_escape_tag():
+    assert redis_service._escape_tag("user-1.a@b c") == r"user\-1\.a\@b\ c"
+    assert redis_service._escape_tag("plain_123") == "plain_123"
+
+
+def test_knn_query_and_result_parsing(redisearch):
+    redisearch.ft.return_value.search.return_value = SimpleNamespace(docs=[
+        SimpleNamespace(id="user_memory:user-1:m1", message="likes tea", score="0.1"),
+        SimpleNamespace(id="user_memory:user-1:m2", message="likes football", score="0.4"),
+    ])
+
+    result = redis_service.get_relevant_memories("user-1", [0.5, 0.25], 2)
+
+    assert result == [{"id": "m1", "message": "likes tea"}, {"id": "m2", "message": "likes football"}]
+    redisearch.ft.assert_called_with(redis_service.MEMORY_VECTOR_INDEX)
+    query, = redisearch.ft.return_value.search.call_args.args
+    params = redisearch.ft.return_value.search.call_args.kwargs["query_params"]
+    assert query.query_string() == r"(@user_id:{user\-1})=>[KNN 2 @embedding $vec AS score]"
+    assert params == {"vec": redis_service.encode_embedding([0.5, 0.25])}
+
+
+def test_creates_index_when_missing(redisearch):
+    redisearch.ft.return_value.info.side_effect = redis.exceptions.ResponseError("Unknown index name")
+
+    assert redis_service._use_vector_index() is True
+    redisearch.ft.return_value.create_index.assert_called_once()
+
+
+def test_falls_back_when_redisearch_is_not_loaded(redisearch, monkeypatch):
+    redisearch.ft.return_value.info.side_effect = redis.exceptions.ResponseError("unknown command 'FT.INFO'")
+    _local_index(monkeypatch)
+
+    result = redis_service.get_relevant_memories("u1", [1.0, 0.0], 1)
+
+    assert result == [{"id": "a", "message": "likes tea"}]
+    assert redis_service._vector_index_available is False
+    redisearch.ft.return_value.search.assert_not_called()
+    redis_service._get_memory_index.assert_called_once_with("u1")
+
+
+def test_falls_back_when_search_fails(redisearch, monkeypatch):
+    redisearch.ft.return_value.search.side_effect = redis.exceptions.ResponseError("Syntax error")
+    _local_index(monkeypatch)
+
+    result = redis_service.get_relevant_memories("u1", [0.0, 1.0], 1)
+
+    assert result == [{"id": "b", "message": "likes football"}]
+    redis_service._get_memory_index.assert_called_once_with("u1")
+
+
+def test_migrates_legacy_memories_before_knn(redisearch, monkeypatch):
+    redisearch.exists.return_value = 1
+    redisearch.ft.return_value.search.return_value = SimpleNamespace(docs=[])
+    migrate = mock.Mock()
+    monkeypatch.setattr(redis_service, "migrate_memory_layout", migrate)
+
+    assert redis_service.get_relevant_memories("u1", [1.0, 0.0], 3) == []
+    migrate.assert_called_once_with("u1")
@@ -0,0 +1,26 @@
+from unittest import mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import ws_chat
+from services import broadcast_service
+
+
+def test_presence_is_released_when_connect_setup_fails(monkeypatch):
+    register, unregister = mock.AsyncMock(), mock.AsyncMock()
+    monkeypatch.setattr(broadcast_service, "register", register)
+    monkeypatch.setattr(broadcast_service, "unregister", unregister)
+    monkeypatch.setattr(ws_chat, "_send_cached_suggestions", mock.AsyncMock(side_effect=ConnectionError("redis down")))
+
+    app = FastAPI()
+    app.include_router(ws_chat.router)
+    with pytest.raises(ConnectionError):
+        with TestClient(app).websocket_connect("/ws/s1/guest/u1") as ws:
+            ws.receive_text()
+
+    register.assert_awaited_once()
+    session_id, socket, role = unregister.await_args.args
+    assert (session_id, role) == ("s1", "guest")
+    assert socket is register.await_args.args[1]